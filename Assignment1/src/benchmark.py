@@ -0,0 +1,133 @@
+# -*-coding: utf-8 -*
+"""
+Runs search algorithms of search.py over the Knight instances of a file, and records for each run the
+wall time, the number of explored nodes, the peak RSS and the depth of the solution.
+Each run is done in its own process, so it can be stopped after a timeout and its peak RSS is its own.
+
+Usage: python3 benchmark.py instances.txt [-a ALGORITHM ...] [-t TIMEOUT] [-r TRIALS] [-o FILE.csv|FILE.json]
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import resource
+import statistics
+import time
+
+import search
+from knight import Knight, State
+
+ALGORITHMS = ['depth_first_graph_search', 'depth_first_tree_search',
+              'breadth_first_graph_search', 'breadth_first_tree_search']
+FIELDS = ['instance', 'algorithm', 'trial', 'status', 'time', 'explored', 'depth', 'peak_rss_kb']
+
+
+def read_instances(filename):
+    """
+    :param filename: a file with one instance per line: "nCols nRows x y"
+    :return: the list of the instances, as tuples of 4 ints
+    """
+    with open(filename) as f:
+        return [tuple(int(e) for e in line.split()) for line in f if line.strip()]
+
+
+def run_trial(algorithm, instance, conn):
+    """
+    Runs one search, in the child process, and sends its results through 'conn'.
+    :param algorithm: the name of a search function of search.py, that takes a problem as only argument
+    :param instance: the instance to solve, as (nCols, nRows, x, y)
+    :param conn: the end of the pipe to the parent process
+    """
+    problem = Knight(State(instance[:2], instance[2:]))
+    start = time.perf_counter()
+    result = getattr(search, algorithm)(problem)
+    elapsed = time.perf_counter() - start
+    node, explored = result
+    depth = node.depth if isinstance(node, search.Node) else None
+    conn.send((elapsed, explored, depth, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def run(algorithm, instance, trial, timeout):
+    """
+    Runs one search in a new process, and stops it after 'timeout' seconds.
+    :return: a dict with the FIELDS of the run
+    """
+    row = dict(instance=" ".join(map(str, instance)), algorithm=algorithm, trial=trial, status='ok',
+               time=None, explored=None, depth=None, peak_rss_kb=None)
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=run_trial, args=(algorithm, instance, child_conn), daemon=True)
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        row['status'] = 'timeout'
+    elif parent_conn.poll():
+        row['time'], row['explored'], row['depth'], row['peak_rss_kb'] = parent_conn.recv()
+        if row['depth'] is None:
+            row['status'] = 'no solution'
+    else:  # The search raised an exception, it is printed by the child process
+        row['status'] = 'error'
+    return row
+
+
+def print_matrix(rows, algorithms):
+    """
+    Prints the median time of each algorithm (columns) on each instance (rows). If some runs failed, the median is
+    the one of the others, followed by the number of failed runs and the status of the first one; if all of them
+    failed, only that status is printed.
+    """
+    instances = list(dict.fromkeys(row['instance'] for row in rows))
+    print("instance".ljust(12) + "".join(a.rjust(28) for a in algorithms))
+    for instance in instances:
+        line = instance.ljust(12)
+        for algorithm in algorithms:
+            runs = [r for r in rows if r['instance'] == instance and r['algorithm'] == algorithm]
+            times = [r['time'] for r in runs if r['status'] == 'ok']
+            failed = [r['status'] for r in runs if r['status'] != 'ok']
+            if not failed:
+                cell = "%.6f" % statistics.median(times)
+            elif times:
+                cell = "%.6f (%d %s)" % (statistics.median(times), len(failed), failed[0])
+            else:
+                cell = failed[0]
+            line += cell.rjust(28)
+        print(line)
+
+
+def write_results(rows, filename):
+    """
+    Writes the runs in 'filename', as JSON if its extension is .json and as CSV otherwise.
+    """
+    with open(filename, 'w', newline='') as f:
+        if filename.endswith('.json'):
+            json.dump(rows, f, indent=2)
+        else:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the search algorithms on Knight instances.")
+    parser.add_argument('instances', help="the instance file, e.g. instances.txt")
+    parser.add_argument('-a', '--algorithms', nargs='+', default=ALGORITHMS,
+                        help="the search functions of search.py to run (default: the 4 graph/tree searches)")
+    parser.add_argument('-t', '--timeout', type=float, default=60, help="the timeout of one run, in seconds")
+    parser.add_argument('-r', '--trials', type=int, default=1, help="the number of runs of each algorithm")
+    parser.add_argument('-o', '--output', help="the CSV or JSON file where the runs are written")
+    args = parser.parse_args()
+
+    for algorithm in args.algorithms:
+        if not callable(getattr(search, algorithm, None)):
+            parser.error("unknown search algorithm: " + algorithm)
+
+    rows = []
+    for instance in read_instances(args.instances):
+        for algorithm in args.algorithms:
+            for trial in range(args.trials):
+                rows.append(run(algorithm, instance, trial, args.timeout))
+
+    print_matrix(rows, args.algorithms)
+    if args.output:
+        write_results(rows, args.output)
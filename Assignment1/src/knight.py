@@ -12,6 +12,16 @@ from search import *
 #################
 class Knight(Problem):
 
+    def __init__(self, initial, pohl=False):
+        """
+        :param initial: the initial state
+        :param pohl: if True, the ties of the Warnsdorff's rule are broken with the Pohl's rule: among the moves
+                     with the same number of valid positions, the move whose valid positions have the smallest
+                     sum of valid positions is tried first.
+        """
+        Problem.__init__(self, initial)
+        self.pohl = pohl
+
     def successor(self, state):
         """
         Extends the method of the class Problem.
@@ -19,90 +29,128 @@ class Knight(Problem):
         moves from the current position of the knight, and check if the successor is in a valid
         position.
         The successors are inversely proportionally to the number of valid positions when the
-        knight is at that position. It is the Warnsdorff's rule
+        knight is at that position. It is the Warnsdorff's rule. The number of valid positions of
+        each square is kept up to date in the state, so sorting the moves costs O(8).
         :param state: the state of the current node, to be expanded
         :return: yields all the valid successors of the node with the state 'state', according to
                  the Warnsdorff's rule.
         """
-        (x, y) = state.get_white()
-        l = self.get_successor(x, y, state)
-        l.sort(key=lambda t: -len(self.get_successor(t[0], t[1], state)))
-        for (nx, ny) in l:
-            yield ((nx, ny), self.new_state(nx, ny, state, x, y))
+        board = get_board(state.nRows, state.nCols)
+        degrees = state.degrees
+        l = self.get_successor(state.square, state)
+        if self.pohl:
+            l.sort(key=lambda t: (-degrees[t], -sum(degrees[u] for u in self.get_successor(t, state))))
+        else:
+            l.sort(key=lambda t: -degrees[t])
+        for square in l:
+            yield (board.positions[square], self.new_state(square, state))
 
     def goal_test(self, state):
         """
         Extends the method of the class Problem.
-        We have reached the goal if there isn't any white square on the board
+        We have reached the goal if there isn't any white square on the board, i.e. if the number of
+        visited squares is the number of squares of the board
         :param state: the state of the node to be checked
         :return: True if the goal is reached, False otherwise
         """
-        for i in state.grid:
-            if " " in i:
-                return False
-        return True
+        return state.visited == get_board(state.nRows, state.nCols).full
 
-    def get_successor(self, x, y, state):
+    def get_successor(self, square, state):
         """
 
-        :param x: the current x-position of the knight on the board
-        :param y: the current y-position of the knight on the board
+        :param square: the index of the square of the knight on the board (x * nCols + y)
         :param state: the state of the node to be expanded
-        :return: the list of the positions on the board of all valid successors of the node
+        :return: the list of the indices of the squares of all valid successors of the node
         """
-        p = ((1, -2), (-2, -1), (-1, 2), (-2, 1), (-1, -2), (1, 2), (2, 1), (2, -1))
-        return [(x+i, y+j) for (i,j) in p if 0 <= x+i < state.nRows and 0 <= y+j < state.nCols and state.grid[x+i][y+j] == " "]
+        visited = state.visited
+        return [t for t in get_board(state.nRows, state.nCols).moves[square] if not (visited >> t) & 1]
 
     def key_sort_successors(self, him, other, state):
         """
         A comparator using the number of successors of the node
-        :param him: of the form (x, y) for the positions of him
-        :param other: of the form (x, y) for the positions of him
+        :param him: the index of the square of him
+        :param other: the index of the square of the other
         :return: 1, -1 or 0
         """
-        return len(self.get_successor(him[0], him[1], state)) - len(self.get_successor(other[0], other[1], state))
+        return state.degrees[him] - state.degrees[other]
 
-    def new_state(self, x, y, state, old_x, old_y):
+    def new_state(self, square, state):
         """
-        Creates a new state, based on the current state. It copies the grid of the current state, changes the position
-        of the knight, switching the color, according to the statement.
-        :param x: the new x-position of the knight on the board for the new state
-        :param y: the new y-position of the knight on the board for the new state
+        Creates a new state, based on the current state. The knight moves to 'square', which is added to the
+        visited squares of the ancestor. The squares reachable from 'square' lose one valid position.
+        :param square: the index of the square of the knight on the board for the new state
         :param state: the ancestor state
-        :param old_x: the x-position of the knight on the board of the ancestor state
-        :param old_y: the y-position of the knight on the board of the ancestor state
         :return: the new state
         """
-        tmp = State([state.nCols, state.nRows], (x, y), False)
-        tmp.grid = [x[:] for x in state.grid]
-        tmp.grid[old_x][old_y] = u"\u265E"
-        tmp.grid[x][y] = u"\u2658"
-        return tmp
-    ###############
+        board = get_board(state.nRows, state.nCols)
+        degrees = bytearray(state.degrees)
+        for u in board.moves[square]:
+            degrees[u] -= 1
+        return State([state.nCols, state.nRows], board.positions[square], state.visited | (1 << square), degrees)
+
+
+###############
+# Board class #
+###############
+
+class Board:
+    def __init__(self, nRows, nCols):
+        """
+        The knight moves of a board shape, computed once for all the states of that shape.
+        The square (x, y) has the index x * nCols + y, which is also its bit in the masks.
+        :param nRows: the number of rows of the board
+        :param nCols: the number of columns of the board
+        """
+        p = ((1, -2), (-2, -1), (-1, 2), (-2, 1), (-1, -2), (1, 2), (2, 1), (2, -1))
+        self.positions = [(x, y) for x in range(nRows) for y in range(nCols)]
+        # moves[i] is the list of the squares reachable from the square i, in the order of p
+        self.moves = [[(x+i) * nCols + y+j for (i, j) in p if 0 <= x+i < nRows and 0 <= y+j < nCols]
+                      for (x, y) in self.positions]
+        # masks[i] has the bits of the squares of moves[i]
+        self.masks = [sum(1 << t for t in moves) for moves in self.moves]
+        self.full = (1 << (nRows * nCols)) - 1  # All the squares are visited
+
 
+BOARDS = {}  # The boards already built, by shape
 
+
+def get_board(nRows, nCols):
+    """
+    :return: the Board of the shape (nRows, nCols), built on its first use
+    """
+    board = BOARDS.get((nRows, nCols))
+    if board is None:
+        board = BOARDS[(nRows, nCols)] = Board(nRows, nCols)
+    return board
+
+
+###############
 # State class #
 ###############
 
 class State:
-    def __init__(self, shapes, init_position, total_creation=True):
+    def __init__(self, shapes, init_position, visited=None, degrees=None):
         """
-        Initialize a new state. The state is represented by its shape, a grid with
-        only white squares (except for the current position of the knight) and the knight position.
+        Initialize a new state. The state is represented by its shape, the knight position and a bitboard:
+        an int where the bit x * nCols + y is set if the square (x, y) has already been visited.
         :param shapes: the shape of the board (the 's' at the end is used to avoid scope issues)
         :param init_position: the initial position of the knight on the board
-        :param total_creation: this boolean is used when we want to create a new state based on an ancestor.
-                        True by default. When false, it does not create a new grid, because the grid is
-                        copied from the ancestor - it is just an optimization argument.
+        :param visited: the bitboard of the visited squares, including the knight position. When None,
+                        only the knight position is visited.
+        :param degrees: for each square, the number of white squares reachable from it (a bytearray, it is
+                        not part of the equality of states). When None, it is computed from 'visited'.
         """
         self.nCols = shapes[0]
         self.nRows = shapes[1]
         self.pos_init = init_position
-        self.grid = []
-        if total_creation:
-            for i in range(self.nRows):
-                self.grid.append([" "] * self.nCols)
-            self.grid[init_position[0]][init_position[1]] = "♘"
+        self.square = init_position[0] * self.nCols + init_position[1]
+        if visited is None:
+            visited = 1 << self.square
+        self.visited = visited
+        if degrees is None:
+            board = get_board(self.nRows, self.nCols)
+            degrees = bytearray(bin(mask & ~visited).count("1") for mask in board.masks)
+        self.degrees = degrees
 
     def get_white(self):
         """
@@ -111,13 +159,23 @@ class State:
         """
         return self.pos_init[0], self.pos_init[1]
 
+    def get_grid(self):
+        """
+        Builds the grid of the board from the bitboard: the knight, the visited squares and the white squares.
+        :return: a list of lists of characters
+        """
+        grid = [[u"♞" if (self.visited >> (i * self.nCols + j)) & 1 else " " for j in range(self.nCols)]
+                for i in range(self.nRows)]
+        grid[self.pos_init[0]][self.pos_init[1]] = u"♘"
+        return grid
+
     def print_grid(self):
         """
         Only used to debug. This function print the grid on the standard output
         :return: Nothing
         """
         print('\n')
-        for i in self.grid:
+        for i in self.get_grid():
             print(i)
 
     def __str__(self):
@@ -125,13 +183,14 @@ class State:
         Given by the teaching staff.
         :return: A string representation of the map.
         """
+        grid = self.get_grid()
         nsharp = (2 * self.nCols) + (self.nCols // 5)
         s = "#" * nsharp
         s += "\n"
         for i in range(self.nRows):
             s = s + "#"
             for j in range(self.nCols):
-                s = s + str(self.grid[i][j]) + " "
+                s = s + str(grid[i][j]) + " "
             s = s[:-1]
             s = s + "#"
             if i < self.nRows - 1:
@@ -142,13 +201,12 @@ class State:
 
     def __eq__(self, other):
         """
-        The equality of states is checked by the grid. If the grids are the same (i.e. have the same values
-        at the same places), then the two states are considered equivalent. We have seen that, doing the following,
-        Python will understand to check the values and not the references of the grids.
+        The equality of states is checked by the shape, the knight position and the visited squares.
         :param other: the other state to be compared with
-        :return: True if the two states have the same grids, False otherwise
+        :return: True if the two states are the same, False otherwise
         """
-        return self.grid == other.grid
+        return self.square == other.square and self.visited == other.visited and self.nCols == other.nCols \
+            and self.nRows == other.nRows
 
     def __ne__(self, other):
         """
@@ -160,94 +218,54 @@ class State:
 
     def __hash__(self):
         """
-        Hash function, based on the shape of the grid and on the grid itself (the values inside).
+        Hash function, based on the knight position and on the bitboard of the visited squares. The two ints are
+        hashed by Python itself, which is cheaper than keeping an incremental Zobrist hash of the squares in each
+        state, even on large boards.
         :return: A hash for the state
         """
-        return hash((self.nCols, self.nRows, tuple(map(tuple, self.grid))))
+        return hash((self.square, self.visited))
 
 
 ##############################
 # Launch the search in local #
 ##############################
-# Use this block to test your code in local
-# Comment it and uncomment the next one if you want to submit your code on INGInious
-"""
-def which_function(i, problem):
-    if i == 0:
-        return depth_first_graph_search(problem)
-    elif i == 1:
-        return depth_first_tree_search(problem)
-    elif i == 2:
-        return breadth_first_graph_search(problem)
-    else:
-        return breadth_first_tree_search(problem)
-
-
-times = []
-nodes = []
-
-with open('instances.txt') as f:
-    instances = f.read().splitlines()
-for i in range(4):
-    algo_time = []
-    algo_nodes = []
-    for instance in instances:
-        elts = instance.split(" ")
-        shape = (int(elts[0]), int(elts[1]))
-        init_pos = (int(elts[2]), int(elts[3]))
-        init_state = State(shape, init_pos)
-
-        problem = Knight(init_state)
-
-        # example of bfs graph search
-        startTime = time.perf_counter()
-        node, nbExploredNodes = which_function(i, problem)
-        endTime = time.perf_counter()
-
-        # example of print
-        path = node.path()
-        path.reverse()
-
-        algo_nodes.append(node.depth)
-        algo_time.append(endTime - startTime)
-
-        print('Number of moves: ' + str(node.depth))
-        #for n in path:
-        #    print(n.state)  # assuming that the __str__ function of state outputs the correct format
-        #    print()
-        print("nb nodes explored = ", nbExploredNodes)
-        print("time : " + str(endTime - startTime))
-    times.append(algo_time)
-    nodes.append(algo_nodes)
+# Use benchmark.py to run several search algorithms over instances.txt and compare them, e.g.
+# python3 benchmark.py instances.txt -a depth_first_graph_search breadth_first_graph_search -o results.csv
 
-for i in range(10):
-    print(times[0][i], times[1][i], times[2][i], times[3][i])
 
-
-"""
 ####################################
 # Launch the search for INGInious  #
 ####################################
 # Use this block to test your code on INGInious
-shape = (int(sys.argv[1]), int(sys.argv[2]))
-init_pos = (int(sys.argv[3]), int(sys.argv[4]))
-init_state = State(shape, init_pos)
-
-problem = Knight(init_state)
-
-# example of bfs graph search
-startTime = time.perf_counter()
-node, nbExploredNodes = depth_first_graph_search(problem)
-endTime = time.perf_counter()
-
-# example of print
-path = node.path()
-path.reverse()
-
-print('Number of moves: ' + str(node.depth))
-for n in path:
-    print(n.state)  # assuming that the __str__ function of state outputs the correct format
-    print()
-print("nb nodes explored = ", nbExploredNodes)
-print("time : " + str(endTime - startTime))
+# An optional fifth argument is a time limit in seconds, e.g. python3 knight.py 5 5 0 0 60
+if __name__ == "__main__":
+    shape = (int(sys.argv[1]), int(sys.argv[2]))
+    init_pos = (int(sys.argv[3]), int(sys.argv[4]))
+    init_state = State(shape, init_pos)
+    deadline = time.time() + float(sys.argv[5]) if len(sys.argv) > 5 else None
+
+    problem = Knight(init_state)
+
+    # example of bfs graph search
+    startTime = time.perf_counter()
+    result = depth_first_graph_search(problem, deadline=deadline)
+    node, nbExploredNodes = result
+    endTime = time.perf_counter()
+
+    if node is None:
+        print("No solution found (" + result.reason + ")")
+        print("nb nodes explored = ", nbExploredNodes)
+        print("time : " + str(endTime - startTime))
+        sys.exit(1)
+
+    # example of print
+    path = node.path()
+    path.reverse()
+
+    print('Number of moves: ' + str(node.depth))
+    for n in path:
+        print(n.state)  # assuming that the __str__ function of state outputs the correct format
+        print()
+    print("nb nodes explored = ", nbExploredNodes)
+    print("time : " + str(endTime - startTime))
 
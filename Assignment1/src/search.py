@@ -7,7 +7,16 @@ functions."""
 from utils import *
 import sys
 import math
+import heapq
 import random
+import time
+import multiprocessing
+import multiprocessing.connection
+import traceback
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
 
 #______________________________________________________________________________
 
@@ -29,6 +38,13 @@ class Problem:
         that yields the successors one at a time, rather than building them
         all at once. Iterators will work fine within the framework."""
         abstract
+
+    def predecessor(self, state):
+        """Given a state, return a sequence of (action, state) pairs such that
+        doing action in the returned state leads to the given state. It is
+        the reverse of successor, and it is only needed by the searches that
+        also go backward from self.goal (bidirectional_breadth_first_search)."""
+        abstract
     
     def goal_test(self, state):
         """Return True if the state is a goal. The default method compares the
@@ -55,10 +71,15 @@ class Node:
     that this is a successor of) and to the actual state for this node. Note
     that if a state is arrived at by two paths, then there are two nodes with
     the same state.  Also includes the action that got us to this state, and
-    the total path_cost (also known as g) to reach the node.  Other functions
-    may add an f and h value; see best_first_graph_search and astar_search for
-    an explanation of how the f and h values are handled. You will not need to
-    subclass this class."""
+    the total path_cost (also known as g) to reach the node. The f and h
+    values are computed by the functions given to best_first_graph_search and
+    astar_search, they are not stored on the node. You will not need to
+    subclass this class.
+    Nodes use __slots__ instead of a per-instance __dict__: uninformed searches
+    allocate millions of them, and this saves about a quarter of their memory
+    (see node_benchmark.py)."""
+
+    __slots__ = ('state', 'parent', 'action', 'path_cost', 'depth')
 
     def __init__(self, state, parent=None, action=None, path_cost=0):
         "Create a search tree Node, derived from a parent by an action."
@@ -88,64 +109,411 @@ class Node:
             yield Node(next, self, act,
                 problem.path_cost(self.path_cost, self.state, act, next))
 
+#______________________________________________________________________________
+# Search budgets
+
+class SearchResult(tuple):
+    """The result of a search. It unpacks as the usual pair (node, n): the
+    goal node found (None if there is none) and the number of explored nodes.
+    The attribute reason tells why the search stopped: 'goal', 'exhausted'
+    (the whole space was searched without finding a goal), or the budget that
+    ran out: 'max_nodes', 'deadline' or 'max_memory' (and 'cutoff' for
+    depth_limited_search). The attribute best is the goal node, or when a
+    budget ran out the last node expanded (for the best-first searches, the
+    most promising one when the search stopped)."""
+
+    def __new__(cls, node, n, reason, best=None):
+        result = tuple.__new__(cls, (node, n))
+        result.reason = reason
+        result.best = node if best is None else best
+        return result
+
+    @property
+    def node(self):
+        return self[0]
+
+    @property
+    def n(self):
+        return self[1]
+
+    def __repr__(self):
+        return "SearchResult(node=%r, n=%d, reason=%r)" % (self[0], self[1], self.reason)
+
+class Budget:
+    """The limits given to a search: max_nodes is a number of explored nodes,
+    deadline an absolute time as returned by time.time(), and max_memory a
+    peak resident memory of the process in bytes. None means no limit. The
+    time and the memory are only checked every check_every explored nodes,
+    as they are much more expensive to read than the node counter.
+    When several searches share a budget (iterative_deepening_search), spent
+    is the number of nodes explored by the ones that already finished."""
+
+    def __init__(self, max_nodes=None, deadline=None, max_memory=None, check_every=1024):
+        if max_memory is not None and resource is None:
+            raise ValueError("max_memory needs the resource module")
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        self.max_memory = max_memory
+        self.check_every = check_every
+        self.next_check = 0
+        self.spent = 0
+
+    def exceeded(self, n):
+        """Return the reason to stop after n explored nodes ('max_nodes',
+        'deadline' or 'max_memory'), or None if the search can go on."""
+        n += self.spent
+        if self.max_nodes is not None and n >= self.max_nodes:
+            return 'max_nodes'
+        if n < self.next_check:
+            return None
+        self.next_check = n + self.check_every
+        if self.deadline is not None and time.time() >= self.deadline:
+            return 'deadline'
+        if self.max_memory is not None and peak_memory() >= self.max_memory:
+            return 'max_memory'
+        return None
+
+class BudgetExceeded(Exception):
+    "Raised to unwind the recursive searches when a budget ran out."
+
+    def __init__(self, reason, node):
+        Exception.__init__(self, reason)
+        self.reason = reason
+        self.node = node
+
+def peak_memory():
+    "Peak resident memory of the process so far, in bytes."
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
 
 #______________________________________________________________________________
 ## Uninformed Search algorithms
 
-def tree_search(problem, fringe):
+def tree_search(problem, fringe, max_nodes=None, deadline=None, max_memory=None):
     """Search through the successors of a problem to find a goal.
     The argument fringe should be an empty queue.
-    Don't worry about repeated paths to a state. [Fig. 3.8]"""
+    Don't worry about repeated paths to a state. [Fig. 3.8]
+    Like all the searches of this module, it stops when one of the budgets
+    max_nodes, deadline or max_memory runs out (see Budget), and returns a
+    SearchResult that tells why it stopped."""
+    budget = Budget(max_nodes, deadline, max_memory)
     fringe.append(Node(problem.initial))
     n = 0
+    node = None
     while fringe:
+        reason = budget.exceeded(n)
+        if reason:
+            return SearchResult(None,n,reason,node)
         node = fringe.pop()
         n += 1
         if problem.goal_test(node.state):
-            return node,n
+            return SearchResult(node,n,'goal')
         #print("not goal")
         fringe.extend(node.expand(problem))
         #print("len fringe = ", len(fringe))
-    return None,n
+    return SearchResult(None,n,'exhausted',node)
 
-def breadth_first_tree_search(problem):
+def breadth_first_tree_search(problem, max_nodes=None, deadline=None, max_memory=None):
     "Search the shallowest nodes in the search tree first. [p 74]"
-    return tree_search(problem, FIFOQueue())
+    return tree_search(problem, FIFOQueue(), max_nodes, deadline, max_memory)
     
-def depth_first_tree_search(problem):
+def depth_first_tree_search(problem, max_nodes=None, deadline=None, max_memory=None):
     "Search the deepest nodes in the search tree first. [p 74]"
-    return tree_search(problem, Stack())
+    return tree_search(problem, Stack(), max_nodes, deadline, max_memory)
 
-def graph_search(problem, fringe):
+def graph_search(problem, fringe, closed=None, max_nodes=None, deadline=None, max_memory=None):
     """Search through the successors of a problem to find a goal.
     The argument fringe should be an empty queue.
-    If two paths reach a state, only use the best one. [Fig. 3.18]"""
-    closed = {}
+    If two paths reach a state, only use the best one. [Fig. 3.18]
+    The argument closed is an empty set-like object (supporting 'in' and add)
+    for the expanded states, a set by default. Use a FingerprintClosedSet
+    when the states do not fit in memory."""
+    if closed is None:
+        closed = set()
+    budget = Budget(max_nodes, deadline, max_memory)
     n = 0
+    node = None
     fringe.append(Node(problem.initial))
     while fringe:
+        reason = budget.exceeded(n)
+        if reason:
+            return SearchResult(None,n,reason,node)
         node = fringe.pop()
         #print(node.state.print_grid())
         n += 1
         #sys.stdout.write("\rnumber of explored nodes = " + str(n))
         if problem.goal_test(node.state):
-            return node,n
+            return SearchResult(node,n,'goal')
         if node.state not in closed:
-            closed[node.state] = True
+            closed.add(node.state)
             fringe.extend(node.expand(problem))
-    return None,n
+    return SearchResult(None,n,'exhausted',node)
 
-def breadth_first_graph_search(problem):
+def breadth_first_graph_search(problem, closed=None, max_nodes=None, deadline=None, max_memory=None):
     "Search the shallowest nodes in the search tree first. [p 74]"
-    return graph_search(problem, FIFOQueue())
+    return graph_search(problem, FIFOQueue(), closed, max_nodes, deadline, max_memory)
     
-def depth_first_graph_search(problem):
+def depth_first_graph_search(problem, closed=None, max_nodes=None, deadline=None, max_memory=None):
     "Search the deepest nodes in the search tree first. [p 74]"
-    return graph_search(problem, Stack())
-
-def depth_limited_search(problem, limit=50):
-    "[Fig. 3.12]"
+    return graph_search(problem, Stack(), closed, max_nodes, deadline, max_memory)
+
+def parallel_breadth_first_graph_search(problem, processes=None, max_nodes=None, deadline=None, max_memory=None):
+    """Breadth-first graph search that expands a whole layer at a time over
+    a pool of worker processes. The states are partitioned by their hash, and
+    each worker owns its partition: its closed set and the records of its
+    nodes. A worker expands the nodes of its last layer and sends each child
+    straight to the worker that owns it, which drops the states it has already
+    seen and tests the others. The main process only receives, for each layer,
+    the number of new nodes and the goals of each worker, and asks for the
+    parent chain of the solution at the end. The layers are processed in
+    order, so the returned node is still one of the shallowest goals.
+    The problem is given to each worker once, at its start, but the children
+    are pickled from a worker to another: the states must be picklable, and
+    small when pickled, and their hash must be the same in all the processes.
+    The max_nodes and max_memory budgets are checked between two layers, and
+    the memory is the one of the main process only. The deadline is also
+    checked while the workers build a layer, which is then lost.
+    An exception raised in a worker is raised again by the main process, and
+    a worker that dies makes it raise a RuntimeError: the workers are then
+    terminated."""
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    pipes = [multiprocessing.Pipe() for _ in range(processes)]
+    inboxes = [multiprocessing.Queue() for _ in range(processes)]
+    workers = [multiprocessing.Process(target=parallel_bfs_worker, args=(problem, w, inboxes, child_end), daemon=True)
+               for w, (_, child_end) in enumerate(pipes)]
+    for w in workers:
+        w.start()
+    # Only the workers keep their end of the pipes, so that a pipe is at
+    # end-of-file if its worker dies
+    for (_, child_end) in pipes:
+        child_end.close()
+    sentinels = [w.sentinel for w in workers]
+    idle = True  # whether the workers all wait for a command
+
+    def receive(w):
+        """Returns the answer of the worker w, or raises the exception of a
+        worker, or BudgetExceeded when the deadline passes."""
+        conn = pipes[w][0]
+        while True:
+            timeout = None if deadline is None else max(0, deadline - time.time())
+            ready = multiprocessing.connection.wait([conn] + sentinels, timeout)
+            if conn in ready:
+                try:
+                    answer = conn.recv()
+                except EOFError:
+                    raise RuntimeError("worker %d of parallel_breadth_first_graph_search died" % w)
+                if isinstance(answer, Exception):
+                    raise answer
+                return answer
+            if ready:
+                dead = sentinels.index(ready[0])
+                raise RuntimeError("worker %d of parallel_breadth_first_graph_search died with exit code %s"
+                                   % (dead, workers[dead].exitcode))
+            if time.time() >= deadline:
+                raise BudgetExceeded('deadline', None)
+
+    def layer(command):
+        nonlocal idle
+        idle = False
+        for (conn, _) in pipes:
+            conn.send(command)
+        results = [receive(w) for w in range(processes)]
+        idle = True
+        return results
+
+    def rebuild(w, i):
+        """Builds the node of the record i of the worker w, with its path."""
+        nonlocal idle
+        records = []
+        while w is not None:
+            idle = False
+            pipes[w][0].send(('record', i))
+            state, (next_w, i), act, path_cost = receive(w)
+            idle = True
+            w = next_w
+            records.append((state, act, path_cost))
+        node = None
+        for (state, act, path_cost) in reversed(records):
+            node = Node(state, node, act, path_cost)
+        return node
+
+    budget = Budget(max_nodes, deadline, max_memory, check_every=1)
+    n = 0
+    try:
+        results = layer('start')
+        while True:
+            n += sum(size for (size, _) in results)
+            for w, (_, goals) in enumerate(results):
+                if goals:
+                    return SearchResult(rebuild(w, goals[0]),n,'goal')
+            last = [(w, size) for w, (size, _) in enumerate(results) if size]
+            if not last:
+                return SearchResult(None,n,'exhausted')
+            reason = budget.exceeded(n)
+            if reason:
+                w, size = last[-1]
+                return SearchResult(None,n,reason,rebuild(w, None))
+            results = layer('expand')
+    except BudgetExceeded as e:
+        return SearchResult(None,n,e.reason)
+    finally:
+        # The workers that are not waiting for a command may be blocked on
+        # the children of a dead one, or busy with a lost layer
+        for w, (conn, _) in zip(workers, pipes):
+            if idle and w.is_alive():
+                conn.send(None)
+            else:
+                w.terminate()
+        for w in workers:
+            w.join()
+        for (conn, _) in pipes:
+            conn.close()
+
+def parallel_bfs_worker(problem, index, inboxes, conn):
+    """Worker index of parallel_breadth_first_graph_search. It keeps the
+    records (state, parent, action, path cost) of the nodes of its partition,
+    where the parent is a (worker, record index) pair, or (None, None) for
+    the root. It answers to the commands of the main process:
+    'start' and 'expand' build the next layer, from the initial state or from
+    the children of the last layer, and answer with its size and the indices
+    of its goals; ('record', i) answers with the record i, or with the last
+    one if i is None; None stops the worker. If a command raises an
+    exception, the worker answers with it and stops."""
+    processes = len(inboxes)
+    closed = set()
+    records = []
+    frontier = []
+    try:
+        command = conn.recv()
+        while command is not None:
+            if command == 'start':
+                root = (problem.initial, (None, None), None, 0)
+                batches = [[root]] if hash(problem.initial) % processes == index else []
+                for w in range(processes):
+                    if w != index:
+                        inboxes[w].put([])
+            elif command == 'expand':
+                # The children are dropped as soon as possible: against the closed
+                # set for the ones of this worker, and against the children already
+                # sent for the others
+                outboxes = [{} for _ in range(processes)]
+                for i in frontier:
+                    state, _, _, path_cost = records[i]
+                    for (act, next) in problem.successor(state):
+                        w = hash(next) % processes
+                        if next not in outboxes[w] and (w != index or next not in closed):
+                            outboxes[w][next] = (next, (index, i), act,
+                                                 problem.path_cost(path_cost, state, act, next))
+                for w, box in enumerate(outboxes):
+                    if w != index:
+                        inboxes[w].put(list(box.values()))
+                batches = [outboxes[index].values()]
+            else:
+                i = command[1]
+                conn.send(records[-1 if i is None else i])
+                command = conn.recv()
+                continue
+            batches += [inboxes[index].get() for _ in range(processes - 1)]
+            frontier = []
+            goals = []
+            for batch in batches:
+                for record in batch:
+                    state = record[0]
+                    if state in closed:
+                        continue
+                    closed.add(state)
+                    frontier.append(len(records))
+                    records.append(record)
+                    if problem.goal_test(state):
+                        goals.append(len(records) - 1)
+            conn.send((len(frontier), goals))
+            command = conn.recv()
+    except Exception as e:
+        try:
+            conn.send(e)
+        except Exception:  # the exception cannot be pickled
+            conn.send(RuntimeError(traceback.format_exc()))
+
+def bidirectional_breadth_first_search(problem, max_nodes=None, deadline=None, max_memory=None):
+    """Breadth-first search from problem.initial and, at the same time,
+    backward from problem.goal with problem.predecessor. The smaller frontier
+    is expanded one whole layer at a time, and both sides index the states
+    they reached in a dict, so the searches meet in the middle after about
+    2*b^(d/2) nodes instead of b^d. The costs are assumed uniform: the
+    returned path is the shortest one in number of steps."""
+    if problem.goal is None:
+        raise ValueError("bidirectional search needs a problem with a goal state")
+    budget = Budget(max_nodes, deadline, max_memory)
+    root = Node(problem.initial)
+    n = 0
+    if problem.goal_test(root.state):
+        return SearchResult(root,n,'goal')
+    forward = {root.state: root}
+    backward = {problem.goal: Node(problem.goal)}
+    forward_layer = [root]
+    backward_layer = [backward[problem.goal]]
+    while forward_layer and backward_layer:
+        is_forward = len(forward_layer) <= len(backward_layer)
+        if is_forward:
+            layer, reached, other = forward_layer, forward, backward
+        else:
+            layer, reached, other = backward_layer, backward, forward
+        next_layer = []
+        meeting = None
+        for node in layer:
+            reason = budget.exceeded(n)
+            if reason:
+                return SearchResult(None,n,reason,forward_layer[-1])
+            n += 1
+            if is_forward:
+                children = node.expand(problem)
+            else:
+                children = (Node(prev, node, act) for (act, prev) in problem.predecessor(node.state))
+            for child in children:
+                if child.state in reached:
+                    continue
+                reached[child.state] = child
+                next_layer.append(child)
+                if child.state in other:
+                    length = child.depth + other[child.state].depth
+                    if meeting is None or length < meeting[0]:
+                        meeting = (length, child, other[child.state])
+        if meeting is not None:
+            if is_forward:
+                return SearchResult(join_paths(problem, meeting[1], meeting[2]),n,'goal')
+            return SearchResult(join_paths(problem, meeting[2], meeting[1]),n,'goal')
+        if is_forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+    return SearchResult(None,n,'exhausted',root)
+
+def join_paths(problem, forward_node, backward_node):
+    """Extend forward_node, a node of the forward search, with the actions
+    that lead from the same state to the goal in backward_node, a node of the
+    backward search. Return the node of the whole path."""
+    node = forward_node
+    while backward_node.parent:
+        act, next = backward_node.action, backward_node.parent.state
+        node = Node(next, node, act,
+            problem.path_cost(node.path_cost, node.state, act, next))
+        backward_node = backward_node.parent
+    return node
+
+def depth_limited_search(problem, limit=50, max_nodes=None, deadline=None, max_memory=None, budget=None):
+    """[Fig. 3.12]
+    The reason of the returned SearchResult is 'cutoff' when no goal was found
+    but some nodes were cut at the depth limit. The budget argument lets
+    iterative_deepening_search share one Budget between its iterations."""
+    n = 0
     def recursive_dls(node, problem, limit):
+        nonlocal n
+        reason = budget.exceeded(n)
+        if reason:
+            raise BudgetExceeded(reason, node)
+        n += 1
         cutoff_occurred = False
         if problem.goal_test(node.state):
             return node
@@ -163,14 +531,37 @@ def depth_limited_search(problem, limit=50):
         else:
             return None
     # Body of depth_limited_search:
-    return recursive_dls(Node(problem.initial), problem, limit)
-
-def iterative_deepening_search(problem):
-    "[Fig. 3.13]"
+    if budget is None:
+        budget = Budget(max_nodes, deadline, max_memory)
+    try:
+        result = recursive_dls(Node(problem.initial), problem, limit)
+    except BudgetExceeded as e:
+        return SearchResult(None,n,e.reason,e.node)
+    if result == 'cutoff':
+        return SearchResult(None,n,'cutoff')
+    if result is None:
+        return SearchResult(None,n,'exhausted')
+    return SearchResult(result,n,'goal')
+
+def iterative_deepening_search(problem, max_nodes=None, deadline=None, max_memory=None):
+    """[Fig. 3.13]
+    The budgets apply to the whole series of depth-limited searches, and n
+    counts the nodes explored by all of them."""
+    budget = Budget(max_nodes, deadline, max_memory)
+    n = 0
     for depth in range(sys.maxsize):
-        result = depth_limited_search(problem, depth)
-        if result is not 'cutoff':
-            return result
+        result = depth_limited_search(problem, depth, budget=budget)
+        budget.spent += result.n
+        n += result.n
+        if result.reason != 'cutoff':
+            return SearchResult(result.node,n,result.reason,result.best)
+
+def uniform_cost_search(problem, max_nodes=None, deadline=None, max_memory=None):
+    """Search the nodes with the lowest path cost g(n) first [Fig. 3.14].
+    The first goal popped is an optimal one, whatever the step costs."""
+    def f(n):
+        return n.path_cost
+    return lazy_graph_search(problem, PriorityQueue(f,min), None, max_nodes, deadline, max_memory)
 
 
 
@@ -180,34 +571,286 @@ def iterative_deepening_search(problem):
 #______________________________________________________________________________
 # Informed (Heuristic) Search
 
-def best_first_graph_search(problem, f):
+def best_first_graph_search(problem, f, max_nodes=None, deadline=None, max_memory=None):
     """Search the nodes with the lowest f scores first.
     You specify the function f(node) that you want to minimize; for example,
     if f is a heuristic estimate to the goal, then we have greedy best
     first search; if f is node.depth then we have depth-first search."""
-    return graph_search(problem, PriorityQueue(f,min))
+    return graph_search(problem, PriorityQueue(f,min), None, max_nodes, deadline, max_memory)
 
-def astar_graph_search(problem, h):
+def astar_graph_search(problem, h, max_nodes=None, deadline=None, max_memory=None):
     """A* search is best-first graph search with f(n) = g(n)+h(n).
     You need to specify the h function when you call astar_search."""
     def f(n):
         return n.path_cost + h(n)
-    return best_first_graph_search(problem, f)
-
+    return best_first_graph_search(problem, f, max_nodes, deadline, max_memory)
+
+def lazy_graph_search(problem, fringe, stats=None, max_nodes=None, deadline=None, max_memory=None):
+    """Graph search that keeps, for each state, the best path cost (g) found
+    so far. A successor is only pushed if it improves the known g of its
+    state, and the entries that were superseded in the fringe are dropped
+    when they are popped (lazy deletion) instead of being expanded again.
+    A closed state reached with a better g is re-opened.
+    If stats is a dict, it is filled with the counters 'pushed' (nodes put
+    in the fringe), 'skipped' (successors not pushed), 'stale' (outdated
+    entries dropped at pop time) and 'reopened' (closed states re-opened)."""
+    if stats is None:
+        stats = {}
+    stats.update(pushed=1, skipped=0, stale=0, reopened=0)
+    budget = Budget(max_nodes, deadline, max_memory)
+    best_g = {problem.initial: 0}
+    closed = {}
+    n = 0
+    last = None
+    fringe.append(Node(problem.initial))
+    while fringe:
+        reason = budget.exceeded(n)
+        if reason:
+            return SearchResult(None,n,reason,last)
+        node = fringe.pop()
+        if node.path_cost > best_g[node.state] or node.state in closed:
+            stats['stale'] += 1
+            continue
+        n += 1
+        last = node
+        if problem.goal_test(node.state):
+            return SearchResult(node,n,'goal')
+        closed[node.state] = True
+        for child in node.expand(problem):
+            g = best_g.get(child.state)
+            if g is not None and child.path_cost >= g:
+                stats['skipped'] += 1
+                continue
+            if child.state in closed:
+                stats['reopened'] += 1
+                del closed[child.state]
+            best_g[child.state] = child.path_cost
+            fringe.append(child)
+            stats['pushed'] += 1
+    return SearchResult(None,n,'exhausted',last)
+
+def astar_lazy_graph_search(problem, h, stats=None, max_nodes=None, deadline=None, max_memory=None):
+    """A* graph search with a best-g table and lazy deletion of the stale
+    fringe entries (see lazy_graph_search). It returns the same solution
+    cost as astar_graph_search, but each state is pushed and expanded far
+    less often."""
+    def f(n):
+        return n.path_cost + h(n)
+    return lazy_graph_search(problem, PriorityQueue(f,min), stats, max_nodes, deadline, max_memory)
 
-def best_first_tree_search(problem, f):
+def weighted_astar_search(problem, h, w=2, max_nodes=None, deadline=None, max_memory=None):
+    """Weighted A*: best-first graph search with f(n) = g(n)+w*h(n), w >= 1.
+    With an admissible h, the cost of the solution found is at most w times
+    the optimal one, and usually far fewer nodes are explored than with A*
+    (w = 1 is A*, a large w tends to greedy best-first search)."""
+    def f(n):
+        return n.path_cost + w * h(n)
+    return lazy_graph_search(problem, PriorityQueue(f,min), None, max_nodes, deadline, max_memory)
+
+def anytime_astar_search(problem, h, w=3, step=0.5, max_nodes=None, deadline=None, max_memory=None):
+    """Anytime repairing A* (ARA*, Likhachev et al. 2003). Generator that
+    runs a series of weighted A* searches with a decreasing weight w, down
+    to 1, and yields after each of them a tuple (node, n, bound): the best
+    solution found so far, the number of nodes explored since the start,
+    and a bound on its suboptimality (its cost is at most bound times the
+    optimal one, with an admissible h); an iteration that improves neither
+    is not reported. The last solution yielded is an optimal one, so the
+    caller can stop at any time (e.g. at a deadline) and keep the last
+    solution.
+    An iteration does not start from scratch: the g values are kept, a state
+    is expanded at most once per iteration, and the states whose g improved
+    after their expansion are put aside and re-opened at the next one.
+    When a budget runs out, the best solution found so far is yielded a last
+    time if it was not reported yet, with the bound known at that point.
+    The budgets are checked between two expansions."""
+    budget = Budget(max_nodes, deadline, max_memory)
+    root = Node(problem.initial)
+    nodes = {root.state: root}
+    h_values = {root.state: h(root)}
+    incumbent = root if problem.goal_test(root.state) else None
+    def key(state):
+        return nodes[state].path_cost + w * h_values[state]
+    def suboptimality():
+        lower = min((nodes[s].path_cost + h_values[s] for s in opened | inconsistent),
+            default=math.inf)
+        return max(min(w, incumbent.path_cost / lower) if lower > 0 else w, 1)
+    opened = {root.state}
+    inconsistent = set()
+    last = (None, None)
+    count = 0
+    n = 0
+    while True:
+        heap = []
+        for state in opened:
+            heap.append((key(state), count, state))
+            count += 1
+        heapq.heapify(heap)
+        closed = set()
+        while heap:
+            reason = budget.exceeded(n)
+            if reason:
+                if incumbent is not None and incumbent is not last[0]:
+                    yield incumbent, n, suboptimality()
+                return
+            f, _, state = heap[0]
+            if state not in opened or f != key(state):
+                heapq.heappop(heap)
+                continue
+            if incumbent is not None and incumbent.path_cost <= f:
+                break
+            heapq.heappop(heap)
+            opened.remove(state)
+            closed.add(state)
+            n += 1
+            for child in nodes[state].expand(problem):
+                old = nodes.get(child.state)
+                if old is not None and old.path_cost <= child.path_cost:
+                    continue
+                nodes[child.state] = child
+                if old is None:
+                    h_values[child.state] = h(child)
+                if problem.goal_test(child.state) and (incumbent is None
+                        or child.path_cost < incumbent.path_cost):
+                    incumbent = child
+                if child.state in closed:
+                    inconsistent.add(child.state)
+                else:
+                    opened.add(child.state)
+                    heapq.heappush(heap, (key(child.state), count, child.state))
+                    count += 1
+        if incumbent is None:
+            return
+        opened |= inconsistent
+        inconsistent = set()
+        bound = suboptimality()
+        if (incumbent, bound) != last:
+            last = (incumbent, bound)
+            yield incumbent, n, bound
+        if w <= 1 or not opened:
+            return
+        w = max(1, w - step)
+
+
+def best_first_tree_search(problem, f, max_nodes=None, deadline=None, max_memory=None):
     """Search the nodes with the lowest f scores first.
     You specify the function f(node) that you want to minimize; for example,
     if f is a heuristic estimate to the goal, then we have greedy best
     first search; if f is node.depth then we have depth-first search."""
-    return tree_search(problem, PriorityQueue(f,min))
+    return tree_search(problem, PriorityQueue(f,min), max_nodes, deadline, max_memory)
 
-def astar_tree_search(problem, h):
+def astar_tree_search(problem, h, max_nodes=None, deadline=None, max_memory=None):
     """A* search is best-first graph search with f(n) = g(n)+h(n).
     You need to specify the h function when you call astar_search."""
     def f(n):
         return n.path_cost + h(n)
-    return best_first_tree_search(problem, f)
+    return best_first_tree_search(problem, f, max_nodes, deadline, max_memory)
+
+def ida_star_search(problem, h, transposition=False, max_nodes=None, deadline=None, max_memory=None):
+    """Iterative-deepening A*: a series of depth-first searches, each one
+    bounded by a limit on f(n) = g(n)+h(n). The next limit is the smallest f
+    that exceeded the current one. Only the current path is kept in memory,
+    and states already on that path are not visited again.
+    If transposition is True, a table of the best g of each state seen during
+    the current iteration prunes the states reached again by a path that is
+    not cheaper; this trades the linear memory for fewer explored nodes."""
+    budget = Budget(max_nodes, deadline, max_memory)
+    n = 0
+    def recursive_ida(node, bound, on_path, table):
+        nonlocal n
+        f = node.path_cost + h(node)
+        if f > bound:
+            return None, f
+        reason = budget.exceeded(n)
+        if reason:
+            raise BudgetExceeded(reason, node)
+        n += 1
+        if problem.goal_test(node.state):
+            return node, f
+        next_bound = math.inf
+        for child in node.expand(problem):
+            if child.state in on_path:
+                continue
+            if table is not None:
+                g = table.get(child.state)
+                if g is not None and g <= child.path_cost:
+                    continue
+                table[child.state] = child.path_cost
+            on_path.add(child.state)
+            result, t = recursive_ida(child, bound, on_path, table)
+            on_path.remove(child.state)
+            if result is not None:
+                return result, t
+            next_bound = min(next_bound, t)
+        return None, next_bound
+    # Body of ida_star_search:
+    root = Node(problem.initial)
+    bound = h(root)
+    while True:
+        table = {root.state: 0} if transposition else None
+        try:
+            result, bound = recursive_ida(root, bound, {root.state}, table)
+        except BudgetExceeded as e:
+            return SearchResult(None,n,e.reason,e.node)
+        if result is not None:
+            return SearchResult(result,n,'goal')
+        if bound == math.inf:
+            return SearchResult(None,n,'exhausted')
+
+def recursive_best_first_search(problem, h, transposition=False, max_nodes=None, deadline=None, max_memory=None):
+    """Recursive best-first search [Fig. 3.26]. It mimics A* with memory
+    linear in the depth of the solution: it remembers the f value of the best
+    alternative path from any ancestor, unwinds when the current path exceeds
+    it, and backs up the best f of the forgotten subtree. States already on
+    the current path are not visited again.
+    If transposition is True, a table of the best g found for each state
+    prunes the successors reached by a strictly more expensive path."""
+    budget = Budget(max_nodes, deadline, max_memory)
+    n = 0
+    table = {} if transposition else None
+    def rbfs(node, f_node, f_limit, on_path):
+        nonlocal n
+        reason = budget.exceeded(n)
+        if reason:
+            raise BudgetExceeded(reason, node)
+        n += 1
+        if problem.goal_test(node.state):
+            return node, f_node
+        successors = []
+        for child in node.expand(problem):
+            if child.state in on_path:
+                continue
+            if table is not None:
+                g = table.get(child.state)
+                if g is not None and g < child.path_cost:
+                    continue
+                table[child.state] = child.path_cost
+            successors.append([max(child.path_cost + h(child), f_node), child])
+        if not successors:
+            return None, math.inf
+        while True:
+            successors.sort(key=lambda s: s[0])
+            best = successors[0]
+            # An infinite f means that no goal is reachable from any successor:
+            # the test is needed at the root, where f_limit is infinite too
+            if best[0] > f_limit or best[0] == math.inf:
+                return None, best[0]
+            alternative = successors[1][0] if len(successors) > 1 else math.inf
+            on_path.add(best[1].state)
+            result, best[0] = rbfs(best[1], best[0], min(f_limit, alternative), on_path)
+            on_path.remove(best[1].state)
+            if result is not None:
+                return result, best[0]
+    # Body of recursive_best_first_search:
+    root = Node(problem.initial)
+    if table is not None:
+        table[root.state] = 0
+    try:
+        result, _ = rbfs(root, h(root), math.inf, {root.state})
+    except BudgetExceeded as e:
+        return SearchResult(None,n,e.reason,e.node)
+    if result is None:
+        return SearchResult(None,n,'exhausted')
+    return SearchResult(result,n,'goal')
 
 
 
@@ -0,0 +1,59 @@
+# -*-coding: utf-8 -*
+"""
+Compares the Pacmen heuristics with astar_graph_search over instance files: for each instance and each heuristic,
+it records the depth of the solution, the number of explored nodes and the wall time.
+
+Usage: python3 benchmark.py instances/i01 instances/i02 ... [-H HEURISTIC ...] [-o FILE.csv]
+"""
+import argparse
+import csv
+import time
+
+import pacmen
+from pacmen import Pacmen, Layout, readInstanceFile
+from search import astar_graph_search
+
+HEURISTICS = ['heuristic_2', 'heuristic', 'heuristic_mst', 'heuristic_partition']
+FIELDS = ['instance', 'heuristic', 'depth', 'explored', 'time']
+
+
+def run(filename, heuristic):
+    """
+    Solves the instance 'filename' with A* and the heuristic of pacmen.py named 'heuristic'.
+    :return: a dict with the FIELDS of the run
+    """
+    grid = readInstanceFile(filename)
+    problem = Pacmen(Layout(grid).initial_state(grid))
+    start = time.perf_counter()
+    node, explored = astar_graph_search(problem, getattr(pacmen, heuristic))
+    elapsed = time.perf_counter() - start
+    return dict(instance=filename, heuristic=heuristic, depth=node.depth if node else None, explored=explored,
+                time=elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the Pacmen heuristics with A*.")
+    parser.add_argument('instances', nargs='+', help="the instance files, e.g. instances/i*")
+    parser.add_argument('-H', '--heuristics', nargs='+', default=HEURISTICS,
+                        help="the heuristic functions of pacmen.py to compare")
+    parser.add_argument('-o', '--output', help="the CSV file where the runs are written")
+    args = parser.parse_args()
+
+    for heuristic in args.heuristics:
+        if not callable(getattr(pacmen, heuristic, None)):
+            parser.error("unknown heuristic: " + heuristic)
+
+    rows = []
+    print("instance".ljust(16) + "heuristic".ljust(22) + "depth".rjust(6) + "explored".rjust(10) + "time".rjust(12))
+    for filename in args.instances:
+        for heuristic in args.heuristics:
+            row = run(filename, heuristic)
+            rows.append(row)
+            print(filename.ljust(16) + heuristic.ljust(22) + str(row['depth']).rjust(6) +
+                  str(row['explored']).rjust(10) + ("%.4f" % row['time']).rjust(12))
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
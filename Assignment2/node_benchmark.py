@@ -0,0 +1,39 @@
+# -*-coding: utf-8 -*
+"""
+Measures the memory used by the nodes of a search tree, before (a Node with a
+__dict__) and after (the __slots__ Node of search.py).
+Usage: python3 node_benchmark.py [number of nodes]
+"""
+import sys
+import tracemalloc
+from search import Node
+
+
+class DictNode(Node):
+    """A Node subclass without __slots__, so it gets back a per-instance __dict__,
+    as search.Node had before."""
+    pass
+
+
+def bytes_per_node(node_class, n):
+    """
+    Builds a chain of n nodes of the class 'node_class' and measures the memory allocated.
+    The state is shared by all nodes, so only the node itself is measured.
+    :param node_class: the class of the nodes to allocate
+    :param n: the number of nodes to allocate
+    :return: the average number of bytes allocated per node
+    """
+    state = object()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    node = node_class(state)
+    for _ in range(n - 1):
+        node = node_class(state, node)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / n
+
+
+n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+print("dict node  : %.1f bytes per node" % bytes_per_node(DictNode, n))
+print("slots node : %.1f bytes per node" % bytes_per_node(Node, n))
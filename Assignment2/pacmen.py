@@ -3,6 +3,9 @@
 import time
 from search import *
 import itertools
+import os
+import weakref
+from array import array
 
 
 #################
@@ -10,6 +13,15 @@ import itertools
 #################
 class Pacmen(Problem):
 
+    def __init__(self, initial, decomposition=False):
+        """
+        :param initial: the initial state
+        :param decomposition: if True, the successors use operator decomposition: the pacmen move one at a time,
+                              through intermediate states, instead of all together (see successor_decomposed)
+        """
+        Problem.__init__(self, initial)
+        self.decomposition = decomposition
+
     def successor(self, state):
         """
         Extends the method of the class Problem.
@@ -18,6 +30,9 @@ class Pacmen(Problem):
         position.
         We compute the possible next state of each pacman, and then make a product of these to have all the possible
         successors of the current state. We remove the possibility that each pacman stays at his place
+        The valid moves of each cell are precomputed in the layout, so building a successor only costs O(#pacmen).
+        The product is iterated lazily: the successors are yielded one at a time, without building the list of all
+        the joint moves first.
         :param state: the state of the current node, to be expanded
         :return: yields all the valid successors of the node with the state 'state'
         """
@@ -28,62 +43,221 @@ class Pacmen(Problem):
         """
         can_stay = True
 
+        if self.decomposition:
+            yield from self.successor_decomposed(state)
+            return
+
+        layout = state.layout
+        # li is a list, where each element is a list of possible (action, new cell) for a pacman
         if can_stay:
-            goto = [(1, 0), (-1, 0), (0, 1), (0, -1), (0, 0)]
+            li = [layout.moves[p] for p in state.pacmen]
         else:
-            goto = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-
-        # li is a list, where each element is a list of possible actions for a pacman
-        li = [[(x, y) for (x, y) in goto if self.validePos(state, (xp + x, yp + y))] for (xp, yp) in state.pacmenPos]
-        prod = list(itertools.product(*li))
-
-        if can_stay:  # If a pacman can stay at his place, we remove the possibility of nobody moving
-            l = tuple([(0, 0) for i in range(len(state.pacmenPos))])
-            prod.remove(l)
-
-        for act in prod:
-            boo = True
-            new_positions = []
-            grid = [x[:] for x in state.grid]
-            for i in range(len(state.pacmenPos)):
-                x,y = state.pacmenPos[i]
-                ax,ay = act[i]
-                nx, ny = x+ax, y+ay
-                if (x, y) not in new_positions: # If the current position of the pacman is not a new position
-                    # Then we erase the current position from the grid. Otherwise, we keep the $ symbol
-                    grid[x][y] = " "
-                if (nx, ny) in new_positions:  # If two pacmen move towards the same position
-                    boo = False  # We break both for-loops, because it is not a valid successor
-                    break
-                else:
-                    new_positions.append((nx, ny))  # Append the new position
-                grid[nx][ny] = "$"
-            if boo:  # If it is a valid state
-                new_state = State(grid)
-                yield (act, new_state)
-
-    def validePos(self, state, pos):
-        """
-        Check if the position given by 'pos' is valid in the sens that it is a movement inside the grid,
-        and it is not a wall
-        :param state: the current state
-        :param pos: the new position to be checked
-        :return: True if the position is valid, False otherwise
+            li = [layout.moves[p][:-1] for p in state.pacmen]  # The last move of each cell is (0, 0)
+        # If a pacman can stay at his place, we skip the possibility of nobody moving
+        nobody_moves = tuple([((0, 0), p) for p in state.pacmen]) if can_stay else None
+
+        for moves in itertools.product(*li):
+            if moves == nobody_moves:
+                continue
+            new_positions = [cell for (_, cell) in moves]
+            if len(set(new_positions)) < len(new_positions):  # If two pacmen move towards the same position
+                continue  # It is not a valid successor
+            act = tuple([a for (a, _) in moves])
+            food = state.foodMask
+            for cell in new_positions:  # The pacmen eat the food of their new cells
+                if (food >> cell) & 1:
+                    food ^= 1 << cell
+            yield (act, State(layout, tuple(sorted(new_positions)), food))
+
+    def successor_decomposed(self, state):
         """
-        (x, y) = pos
-        return 0 <= x < state.nbr and 0 <= y < state.nbc and state.grid[x][y] != "x"
+        The successors with operator decomposition: only the pacman number 'state.turn' moves, and the next pacman
+        will move in the successor. The states where some pacmen have moved and others not are intermediate states.
+        When the last pacman has moved, the move of all the pacmen is complete and the pacmen are sorted again.
+        A pacman cannot move to a cell already taken by a pacman that moved before it, so the collisions are rejected
+        while the moves are generated, and the move where no pacman moves is rejected at the last pacman.
+        Only the last move of each round costs 1 (see path_cost), so A* can compare and prune the partial moves.
+        :param state: the state of the current node, to be expanded
+        :return: yields the ((pacman, action), state) successors of the node with the state 'state'
+        """
+        layout = state.layout
+        i = state.turn
+        last = i == len(state.pacmen) - 1
+        taken = state.pacmen[:i]  # The new cells of the pacmen that already moved
+        for (a, cell) in layout.moves[state.pacmen[i]]:
+            if cell in taken:  # Two pacmen move towards the same position
+                continue
+            moved = state.moved or a != (0, 0)
+            if last and not moved:  # Nobody moved
+                continue
+            pacmen = state.pacmen[:i] + (cell,) + state.pacmen[i + 1:]
+            food = state.foodMask
+            if (food >> cell) & 1:
+                food ^= 1 << cell
+            if last:
+                yield ((i, a), State(layout, tuple(sorted(pacmen)), food))
+            else:
+                yield ((i, a), State(layout, pacmen, food, i + 1, moved))
+
+    def path_cost(self, c, state1, action, state2):
+        """
+        Extends the method of the class Problem.
+        A move of the pacmen costs 1. With operator decomposition, it is charged when the last pacman moves, i.e.
+        when the successor is not an intermediate state.
+        """
+        return c + 1 if state2.turn == 0 else c
 
     def goal_test(self, state):
         """
         Extends the method of the class Problem.
-        The goal is reached if there is no food on the board given by 'state'
+        The goal is reached if there is no food on the board given by 'state', i.e. if its food mask is empty,
+        and if it is not an intermediate state of the operator decomposition
         :param state: the current state
         :return: True if the goal is reached (no food on the board), False otherwise
         """
-        for i in state.grid:
-            if "@" in i:
-                return False
-        return True
+        return state.foodMask == 0 and state.turn == 0
+
+    def __reduce__(self):
+        """
+        Pickles the problem with the whole layout of its initial state, e.g. when it is given to the workers of
+        parallel_breadth_first_graph_search. The states themselves only refer to their layout by its key (see
+        Layout.__reduce__), so the layout is pickled once per process and not with each state.
+        """
+        s = self.initial
+        return (unpickle_pacmen, (vars(s.layout), s.pacmen, s.foodMask, self.decomposition))
+
+
+def unpickle_pacmen(attributes, pacmen, foodMask, decomposition):
+    """
+    Rebuilds a problem pickled by Pacmen.__reduce__, and registers its layout in this process if it is not known yet.
+    """
+    layout = LAYOUTS.get(attributes['key'])
+    if layout is None:
+        layout = Layout.__new__(Layout)
+        vars(layout).update(attributes)
+        LAYOUTS[layout.key] = layout
+    return Pacmen(State(layout, pacmen, foodMask), decomposition)
+
+
+################
+# Layout class #
+################
+
+UNREACHABLE = 2 ** 31 - 1  # The distance between two cells that are not connected
+LAYOUTS = weakref.WeakValueDictionary()  # The layouts known by this process, by key, to unpickle the states
+
+class Layout:
+
+    keys = itertools.count()  # The keys of the layouts of this process, see __reduce__
+
+    def __init__(self, grid, prune=True):
+        """
+        The part of an instance that never changes during the search: the shape of the grid and its walls.
+        It is shared by all the states of the instance. Each open cell (not a wall) gets an index, in the order of
+        the rows, and the states refer to the cells by these indices.
+        The pacmen are interchangeable: the states keep their cells sorted, so the permutations of the pacmen are
+        the same state.
+        :param grid: the grid of the instance, as read by readInstanceFile
+        :param prune: if True, the dead cells (see find_dead_cells) are removed from the moves
+        """
+        self.nbr = len(grid)
+        self.nbc = len(grid[0])
+        self.walls = [[grid[x][y] == "x" for y in range(self.nbc)] for x in range(self.nbr)]
+        self.cells = [(x, y) for x in range(self.nbr) for y in range(self.nbc) if not self.walls[x][y]]
+        self.index = {pos: i for (i, pos) in enumerate(self.cells)}
+        # moves[i] is the list of the valid (action, new cell) from the cell i. Staying, (0, 0), is always the last one
+        goto = [(1, 0), (-1, 0), (0, 1), (0, -1), (0, 0)]
+        self.moves = [[((a, b), self.index[(x + a, y + b)]) for (a, b) in goto if self.valide_pos((x + a, y + b))]
+                      for (x, y) in self.cells]
+        self.dead = self.find_dead_cells(grid) if prune else [False] * len(self.cells)
+        self.moves = [[(a, j) for (a, j) in moves if not self.dead[j]] for moves in self.moves]
+        self.distances = None  # The all-pairs distance table, computed by get_distances when it is first needed
+        self.key = (os.getpid(), next(Layout.keys))
+        LAYOUTS[self.key] = self
+
+    def __reduce__(self):
+        """
+        Pickles the layout as its key only: a state is unpickled with the layout of the same key in the process that
+        unpickles it. The whole layout is pickled with the problem (see Pacmen.__reduce__), or inherited by the forked
+        processes.
+        """
+        return (shared_layout, (self.key,))
+
+    def valide_pos(self, pos):
+        """
+        Check if the position given by 'pos' is valid in the sens that it is inside the grid, and it is not a wall
+        :param pos: the position to be checked
+        :return: True if the position is valid, False otherwise
+        """
+        (x, y) = pos
+        return 0 <= x < self.nbr and 0 <= y < self.nbc and not self.walls[x][y]
+
+    def find_dead_cells(self, grid):
+        """
+        Finds the dead-end corridors without food: a cell with only one open neighbour, and no food nor pacman, is
+        never worth a visit, since the pacman would have to come back the same way. It is removed, which can make
+        its neighbour a dead end too, and so on until the whole corridor is removed. The foods are only eaten during
+        the search, so a cell without food at the beginning never gets one.
+        :param grid: the grid of the instance, as read by readInstanceFile
+        :return: a list of booleans, True for the dead cells
+        """
+        dead = [False] * len(self.cells)
+        degree = [len(moves) - 1 for moves in self.moves]  # The number of open neighbours, without staying
+        q = [i for i in range(len(self.cells)) if degree[i] <= 1]
+        for i in q:  # q grows while it is iterated
+            (x, y) = self.cells[i]
+            if dead[i] or degree[i] > 1 or grid[x][y] in "$@":
+                continue
+            dead[i] = True
+            for (_, j) in self.moves[i]:
+                if not dead[j]:
+                    degree[j] -= 1
+                    if degree[j] == 1:
+                        q.append(j)
+        return dead
+
+    def get_distances(self):
+        """
+        The table of the maze distances between all the pairs of open cells: the distance from the cell i to the
+        cell j is distances[i * n + j], where n is the number of open cells, and UNREACHABLE if there is no path.
+        It is computed once, with a BFS from each cell, since the walls never change during the search.
+        :return: the distance table, a flat array of ints
+        """
+        if self.distances is None:
+            n = len(self.cells)
+            distances = array('i', [UNREACHABLE]) * (n * n)
+            for source in range(n):
+                row = source * n
+                distances[row + source] = 0
+                q = [source]
+                for i in q:  # q grows while it is iterated: it is the FIFO queue of the BFS
+                    d = distances[row + i] + 1
+                    for (_, j) in self.moves[i]:
+                        if distances[row + j] == UNREACHABLE:
+                            distances[row + j] = d
+                            q.append(j)
+            self.distances = distances
+        return self.distances
+
+    def initial_state(self, grid):
+        """
+        Creates the state of the pacmen and of the foods of 'grid'.
+        :param grid: the grid of the instance, as read by readInstanceFile
+        :return: the state
+        """
+        pacmen = tuple(i for (i, (x, y)) in enumerate(self.cells) if grid[x][y] == "$")
+        food = 0
+        for (i, (x, y)) in enumerate(self.cells):
+            if grid[x][y] == "@":
+                food |= 1 << i
+        return State(self, pacmen, food)
+
+
+def shared_layout(key):
+    """
+    :return: the layout of key known by this process (see Layout.__reduce__)
+    """
+    return LAYOUTS[key]
 
 
 ###############
@@ -92,33 +266,68 @@ class Pacmen(Problem):
 
 class State:
 
-    def __init__(self, grid):
+    def __init__(self, layout, pacmen, foodMask, turn=0, moved=False):
         """
-        Initialize a new state. The state is represented by its shape, a grid with the initial positions of the
-        pacmen, and the foods.
-        The coordinates of the pacmen and of the foods are kept in list to easier the retrieve of information.
-        :param grid: The grid containing all the information about the location of the walls, the pacmen and the foods.
+        Initialize a new state. The walls are shared by all the states in the layout, so a state only contains
+        the cells of the pacmen and of the foods.
+        :param layout: the layout of the instance
+        :param pacmen: the sorted tuple of the indices of the cells of the pacmen
+        :param foodMask: an int where the bit i is set if there is a food on the cell i
+        :param turn: with operator decomposition, the index of the next pacman to move. If it is not 0, the state is
+                     an intermediate state: the pacmen before 'turn' have moved, and 'pacmen' is not sorted
+        :param moved: with operator decomposition, True if one of the pacmen before 'turn' did not stay at his place
         """
-        self.nbr = len(grid)
-        self.nbc = len(grid[0])
-        self.grid = grid
-        self.pacmenPos = []  # list of all pacmen
-        self.food = []  # list of all the foods on the board, given by 'grid'
-        for x in range(self.nbr):
-            for y in range(self.nbc):
-                if grid[x][y] == "$":
-                    self.pacmenPos.append((x, y))
-                elif grid[x][y] == "@":
-                    self.food.append((x, y))
+        self.layout = layout
+        self.pacmen = pacmen
+        self.foodMask = foodMask
+        self.turn = turn
+        self.moved = moved
+
+    @property
+    def nbr(self):
+        return self.layout.nbr
+
+    @property
+    def nbc(self):
+        return self.layout.nbc
+
+    @property
+    def pacmenPos(self):
+        """
+        :return: the list of the (x, y) positions of the pacmen
+        """
+        return [self.layout.cells[i] for i in self.pacmen]
+
+    @property
+    def food(self):
+        """
+        :return: the list of the (x, y) positions of the foods
+        """
+        cells = self.layout.cells
+        return [cells[i] for i in bits(self.foodMask)]
+
+    @property
+    def grid(self):
+        """
+        Builds the grid of the state: 'x' for the walls, '$' for the pacmen, '@' for the foods and ' ' otherwise.
+        :return: a list of lists of characters
+        """
+        grid = [["x" if wall else " " for wall in row] for row in self.layout.walls]
+        for (x, y) in self.food:
+            grid[x][y] = "@"
+        for (x, y) in self.pacmenPos:
+            grid[x][y] = "$"
+        return grid
 
     def __str__(self):
+        grid = self.grid
         nsharp = self.nbc * 2 + 3
         s = "#" * nsharp
         s += '\n'
         for i in range(0, self.nbr):
             s += "# "
             for j in range(0, self.nbc):
-                s += str(self.grid[i][j]) + " "
+                s += str(grid[i][j]) + " "
             s += "#"
             if i < self.nbr:
                 s += '\n'
@@ -127,25 +336,37 @@ class State:
 
     def __eq__(self, other_state):
         """
-        The equality of states is checked by the grid. If the grids are the same (i.e. have the same values
-        at the same places), then the two states are considered equivalent. We have seen that, doing the following,
-        Python will understand to check the values and not the references of the grids.
+        Two states are equivalent if their pacmen are on the same cells and if they have the same foods. As the
+        cells of the pacmen are sorted, the pacmen are interchangeable.
         :param other_state: the other state to be compared with
-        :return: True if the two states have the same grids, False otherwise
+        :return: True if the two states have the same pacmen and foods, False otherwise
         """
-        return self.grid == other_state.grid
+        return self.pacmen == other_state.pacmen and self.foodMask == other_state.foodMask and \
+            self.turn == other_state.turn and self.moved == other_state.moved
 
     def __hash__(self):
         """
-        Hash function, based on the shape of the grid and on the grid itself (the values inside).
+        Hash function, based on the cells of the pacmen and the food mask. The small tuple is hashed by Python
+        itself, which is cheaper than keeping an incremental Zobrist hash of the cells in each state.
         :return: A hash for the state
         """
-        return hash(tuple(map(tuple, self.grid)))
+        return hash((self.pacmen, self.foodMask, self.turn))
 
 
 ######################
 # Auxiliary function #
 ######################
+def bits(mask):
+    """
+    Yields the indices of the bits set in 'mask', from the lowest one. It only iterates over the set bits.
+    :param mask: an int, e.g. the food mask of a state
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
 def readInstanceFile(filename):
     lines = [[char for char in line.rstrip('\n')[1:][:-1]] for line in open(filename)]
     lines = lines[1:len(lines) - 1]
@@ -166,12 +387,16 @@ def heuristic_2(node):
     :return: the maximum of the minimum 'Manhattan distance' computed for each food between the food and the
              nearest pacman.
     """
-    if len(node.state.food) == 0:  # If there is no food, the heuristic returns 0
+    state = node.state
+    if state.foodMask == 0:  # If there is no food, the heuristic returns 0
         return 0
+    cells = state.layout.cells
+    pacmenPos = state.pacmenPos
     distMM = 0
-    for (xf, yf) in node.state.food:
+    for f in bits(state.foodMask):
+        (xf, yf) = cells[f]
         distMin = 999999999999999 # To be sure that we get a valid distance
-        for (x, y) in node.state.pacmenPos:
+        for (x, y) in pacmenPos:
             if distMin > abs(x-xf) + abs(y-yf):
                 distMin = abs(x-xf) + abs(y-yf)
         distMM = max(distMM, distMin) # We keep the biggest minimum 'Manhattan distance' for each food
@@ -179,50 +404,113 @@ def heuristic_2(node):
     return distMM
 
 
-def valide_pos(state, pos, map):
-    """
-    Used in the below heuristic
-    Check if the position 'pos' is valid. The position is valid if it is in the grid, has not been visited yet,
-    and if it is not a wall (both conditions are directly verified if the value is not 'x'.
-    :param state: The state to be processed
-    :param pos: the position to be checked
-    :param map: the current map
-    :return: True if the position is valid, False otherwise
-    """
-    (x,y) = pos
-    return 0 <= x < state.nbr and 0 <= y < state.nbc and map[x][y] != "x"
-
 def heuristic(node):
     """
-    Heuristic using a 'breadth-first' search approach. We start the BFS with all the pacmen as sources. Then
-    we look for the shortest path towards each food (once a food is reached by a pacman, this food is considered as
-    visited). Then the heuristic returns the biggest shortest path computed by the BFS.
-    It uses the class Queue.
+    Heuristic using the maze distances. For each food, we compute the shortest path from the nearest pacman
+    (the foods that no pacman can reach are ignored). Then the heuristic returns the biggest of these shortest
+    paths, minus one.
+    The distances are looked up in the all-pairs distance table of the layout, computed once for the instance,
+    so the heuristic costs O(#pacmen * #foods) per node.
     :param node: The node to be processed
     :return: the maximum of the minimum shortest path computed for each food.
     """
-    food = node.state.food
-    if len(food) == 0:
+    state = node.state
+    if state.foodMask == 0:
         return 0
-
-    q = FIFOQueue()  # Create the FIFO-Queue
-    for i in node.state.pacmenPos:  # Append all the pacmen as source, i.e., with initial distance 0
-        q.append((i, 0))
-
-    map = [x[:] for x in node.state.grid]  # We copy the grid for the process,
-
-    moves = [(1, 0), (-1, 0), (0, 1), (0, -1)]  # The possible moves
+    distances = state.layout.get_distances()
+    n = len(state.layout.cells)
+    rows = [p * n for p in state.pacmen]
 
     total = 0  # The value to be returned
+    for f in bits(state.foodMask):
+        d = min([distances[row + f] for row in rows])
+        if d != UNREACHABLE and d - 1 > total:
+            total = d - 1
+    return total
+
 
-    while len(q) > 0:
-        ((x, y), cost) = q.pop()
-        for (a, b) in moves:
-            if valide_pos(node.state, (x+a, y+b), map):
-                if map[x+a][y+b] == "@":  # A food it is !
-                    total = max(total, cost)  # Getting the maximum
-                map[x+a][y+b] = "x"  # Each visited location is replaced, as it is a wall
-                q.append(((x+a, y+b), cost+1))  # Increment the total cost by 1
+def heuristic_mst(node):
+    """
+    Heuristic using a minimum spanning tree over the foods, with the maze distances. The pacmen are merged into
+    a single source: the distance from the source to a food is the distance of the nearest pacman. The paths of
+    the k pacmen form a spanning forest of the foods rooted at the pacmen, so they have a total length of at least
+    the weight W of the MST, and one of them has a length of at least W / k: ceil(W / k) is admissible.
+    The foods that no pacman can reach are ignored.
+    :param node: The node to be processed
+    :return: the weight of the MST over the source and the foods, divided by the number of pacmen (rounded up)
+    """
+    state = node.state
+    if state.foodMask == 0:
+        return 0
+    distances = state.layout.get_distances()
+    n = len(state.layout.cells)
+    rows = [p * n for p in state.pacmen]
+
+    # Prim's algorithm from the source: key[i] is the distance from the tree to the food foods[i]
+    foods = []
+    key = []
+    for f in bits(state.foodMask):
+        d = min([distances[row + f] for row in rows])
+        if d != UNREACHABLE:
+            foods.append(f)
+            key.append(d)
+    weight = 0
+    while foods:
+        i = key.index(min(key))
+        weight += key[i]
+        f = foods.pop(i)
+        key.pop(i)
+        row = f * n
+        for i in range(len(foods)):
+            d = distances[row + foods[i]]
+            if d < key[i]:
+                key[i] = d
+    k = len(state.pacmen)
+    return (weight + k - 1) // k
+
+
+def heuristic_partition(node):
+    """
+    Heuristic using the maze distances and the ways to share the foods between the pacmen. For each pair of foods
+    (f, g), either the same pacman eats both of them, and it needs at least the distance to the first one plus the
+    distance between them, or two different pacmen eat them, and the search needs at least the biggest of their
+    distances. The minimum over these partitions is a lower bound, and the heuristic returns the maximum of these
+    bounds over all the pairs (and over the single foods, with their nearest pacman).
+    The foods that no pacman can reach are ignored.
+    :param node: The node to be processed
+    :return: the maximum over the pairs of foods of the cost of their best partition between the pacmen
+    """
+    state = node.state
+    if state.foodMask == 0:
+        return 0
+    distances = state.layout.get_distances()
+    n = len(state.layout.cells)
+    rows = [p * n for p in state.pacmen]
+
+    foods = []
+    near = []  # near[i] is the distances from each pacman to foods[i]
+    total = 0
+    for f in bits(state.foodMask):
+        d = [distances[row + f] for row in rows]
+        if min(d) != UNREACHABLE:
+            foods.append(f)
+            near.append(d)
+            total = max(total, min(d))
+
+    pacmen = range(len(rows))
+    for i in range(len(foods)):
+        row = foods[i] * n
+        for j in range(i + 1, len(foods)):
+            between = distances[row + foods[j]]
+            best = min([min(near[i][p], near[j][p]) for p in pacmen]) + between  # The same pacman eats both
+            for p in pacmen:
+                if near[i][p] >= best:
+                    continue
+                for q in pacmen:
+                    if p != q and max(near[i][p], near[j][q]) < best:  # Two different pacmen
+                        best = max(near[i][p], near[j][q])
+            if best > total:
+                total = best
     return total
 
 ###############
@@ -285,25 +573,35 @@ class Queue():
 #####################
 # Launch the search #
 #####################
-grid_init = readInstanceFile(sys.argv[1])
-init_state = State(grid_init)
-#print(init_state)
-
-problem = Pacmen(init_state)
-
-startTime = time.perf_counter()
-#node, nbExploredNodes = astar_graph_search(problem, heuristic)
-node, nbExploredNodes = breadth_first_graph_search(problem)
-endTime = time.perf_counter()
-
-# example of print
-path = node.path()
-path.reverse()
-
-print('Number of moves: ' + str(node.depth))
-for n in path:
-    print(n.state)  # assuming that the __str__ function of state outputs the correct format
-    print()
-
-print("nb nodes explored = ", nbExploredNodes)
-print("time : " + str(endTime - startTime))
+# An optional second argument is a time limit in seconds, e.g. python3 pacmen.py instances/i01 60
+if __name__ == "__main__":
+    grid_init = readInstanceFile(sys.argv[1])
+    init_state = Layout(grid_init).initial_state(grid_init)
+    #print(init_state)
+    deadline = time.time() + float(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    problem = Pacmen(init_state)
+
+    startTime = time.perf_counter()
+    #result = astar_graph_search(problem, heuristic, deadline=deadline)
+    result = breadth_first_graph_search(problem, deadline=deadline)
+    node, nbExploredNodes = result
+    endTime = time.perf_counter()
+
+    if node is None:
+        print("No solution found (" + result.reason + ")")
+        print("nb nodes explored = ", nbExploredNodes)
+        print("time : " + str(endTime - startTime))
+        sys.exit(1)
+
+    # example of print
+    path = [n for n in node.path() if n.state.turn == 0]  # Without the intermediate states of the decomposition
+    path.reverse()
+
+    print('Number of moves: ' + str(node.path_cost))
+    for n in path:
+        print(n.state)  # assuming that the __str__ function of state outputs the correct format
+        print()
+
+    print("nb nodes explored = ", nbExploredNodes)
+    print("time : " + str(endTime - startTime))
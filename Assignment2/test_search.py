@@ -0,0 +1,80 @@
+# -*-coding: utf-8 -*
+"""
+Regression checks of the search functions of search.py on a Pacmen instance without solution.
+
+Usage: python3 -m unittest test_search
+"""
+import os
+import time
+import unittest
+
+from search import *
+from pacmen import Pacmen, Layout, heuristic
+
+# The food is walled off from the pacman
+UNSOLVABLE = [['$', ' ', 'x', ' ', ' '],
+              [' ', ' ', 'x', '@', ' '],
+              [' ', ' ', 'x', ' ', ' ']]
+
+
+class UnsolvableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.problem = Pacmen(Layout(UNSOLVABLE).initial_state(UNSOLVABLE))
+        self.deadline = time.time() + 5
+
+    def check_exhausted(self, result):
+        node, n = result
+        self.assertIsNone(node)
+        self.assertEqual(result.reason, 'exhausted')
+
+    def test_breadth_first(self):
+        self.check_exhausted(breadth_first_graph_search(self.problem, deadline=self.deadline))
+
+    def test_parallel_breadth_first(self):
+        self.check_exhausted(parallel_breadth_first_graph_search(self.problem, 2, deadline=self.deadline))
+
+    def test_ida_star(self):
+        self.check_exhausted(ida_star_search(self.problem, heuristic, deadline=self.deadline))
+
+    def test_recursive_best_first(self):
+        self.check_exhausted(recursive_best_first_search(self.problem, heuristic, deadline=self.deadline))
+
+    def test_recursive_best_first_transposition(self):
+        self.check_exhausted(recursive_best_first_search(self.problem, heuristic, True, deadline=self.deadline))
+
+
+class Failing(Problem):
+    """A problem whose successor function fails on the states after the first layer."""
+
+    def __init__(self, failure):
+        Problem.__init__(self, 0)
+        self.failure = failure
+
+    def successor(self, state):
+        if state > 0:
+            self.failure()
+        return [(i, state * 10 + i) for i in range(1, 10)]
+
+
+def raise_error():
+    raise ValueError("successor failed")
+
+
+def die():
+    os._exit(3)
+
+
+class ParallelFailureTest(unittest.TestCase):
+
+    def test_worker_exception(self):
+        with self.assertRaisesRegex(ValueError, "successor failed"):
+            parallel_breadth_first_graph_search(Failing(raise_error), 3, deadline=time.time() + 5)
+
+    def test_worker_death(self):
+        with self.assertRaisesRegex(RuntimeError, "died"):
+            parallel_breadth_first_graph_search(Failing(die), 3, deadline=time.time() + 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
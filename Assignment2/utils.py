@@ -1,7 +1,12 @@
 """Provide some widely useful utilities. "from utils import *".
 
 """
+import heapq
 import bisect
+import mmap
+import sys
+import tempfile
+from array import array
 
 #______________________________________________________________________________
 # Queues: Stack, FIFOQueue, PriorityQueue
@@ -47,37 +52,120 @@ class FIFOQueue(Queue):
             self.start = 0
         return e
 
-class PriorityQueueElmt:
-    """ The elements of the priority queue """
-    def __init__(self,val,e):
-        self.val = val
-        self.e = e
-    
-    def __lt__(self,other):
-        return self.val < other.val
-    
-    def value(self):
-        return self.val
-    
-    def elem(self):
-        return self.e
-        
-
 class PriorityQueue(Queue):
     """A queue in which the minimum (or maximum) element (as determined by f and
     order) is returned first. If order is min, the item with minimum f(x) is
-    returned first; if order is max, then it is the item with maximum f(x)."""
+    returned first; if order is max, then it is the item with maximum f(x).
+    The queue is a binary heap, so append and pop are O(log n). Items with the
+    same f(x) are returned in insertion order."""
     def __init__(self, f, order=min):
         self.A=[]
         self.order=order
         self.f=f
+        self.count = 0  # insertion counter, used to break ties
     def append(self, item):
-        queueElmt = PriorityQueueElmt(self.f(item),item)
-        bisect.insort(self.A, queueElmt)
+        val = self.f(item)
+        if self.order != min:
+            val = -val
+        heapq.heappush(self.A, (val, self.count, item))
+        self.count += 1
     def __len__(self):
         return len(self.A)
     def pop(self):
-        if self.order == min:
-            return self.A.pop(0).elem()
-        else:
-            return self.A.pop().elem()
\ No newline at end of file
+        return heapq.heappop(self.A)[2]
+
+#______________________________________________________________________________
+# Closed sets
+
+class FingerprintClosedSet:
+    """A closed set for graph_search that stores a fixed-width 64-bit
+    fingerprint of each state instead of the state itself. Two different
+    states with the same fingerprint are considered equal, which is unlikely
+    but possible (hash compaction).
+    The fingerprints are first kept in an in-memory set. If memory_limit (in
+    bytes) is given, the set is spilled when it grows over that limit: it is
+    sorted and written to disk as a new run, a memory-mapped file of sorted
+    fingerprints. The runs are merged as the digits of a binary counter: a run
+    is merged with the previous one while it is at least as large, so each
+    fingerprint is rewritten O(log(n)) times and there are O(log(n)) runs.
+    A state is looked up at once, by a binary search in each run: graph_search
+    needs the answer before it expands the state, so this is not a delayed
+    duplicate detection, and a lookup costs a few random reads of the disk.
+    Supports: s.add(state), state in s, len(s) and s.close()."""
+
+    def __init__(self, memory_limit=None, fingerprint=None, directory=None):
+        self.memory_limit = memory_limit
+        self.fingerprint = fingerprint or (lambda state: hash(state) & 0xFFFFFFFFFFFFFFFF)
+        self.directory = directory  # directory of the disk files, the default temp dir if None
+        self.recent = set()  # fingerprints not yet spilled to disk
+        self.runs = []  # (file, mapping, fingerprints) of the disk runs, the largest first
+
+    def __contains__(self, state):
+        return self.contains(self.fingerprint(state))
+
+    def contains(self, fp):
+        if fp in self.recent:
+            return True
+        for (_, _, disk) in self.runs:
+            i = bisect.bisect_left(disk, fp)
+            if i < len(disk) and disk[i] == fp:
+                return True
+        return False
+
+    def add(self, state):
+        fp = self.fingerprint(state)
+        if self.runs and self.contains(fp):
+            return
+        self.recent.add(fp)
+        if self.memory_limit is not None and \
+                sys.getsizeof(self.recent) + 32 * len(self.recent) > self.memory_limit:
+            self.spill()
+
+    def __len__(self):
+        return len(self.recent) + sum(len(disk) for (_, _, disk) in self.runs)
+
+    def spill(self):
+        """Write the in-memory fingerprints to disk as a new run, and merge
+        the last runs while the last one is at least as large as the previous."""
+        self.runs.append(self.write_run(sorted(self.recent)))
+        self.recent = set()
+        while len(self.runs) >= 2 and len(self.runs[-1][2]) >= len(self.runs[-2][2]):
+            second = self.runs.pop()
+            first = self.runs.pop()
+            self.runs.append(self.write_run(heapq.merge(first[2], second[2])))
+            self.release(first)
+            self.release(second)
+
+    def write_run(self, fingerprints):
+        """Write the sorted fingerprints, without their duplicates, to a new
+        memory-mapped file. Return its (file, mapping, fingerprints)."""
+        file = tempfile.TemporaryFile(dir=self.directory)
+        chunk = array('Q')
+        last = None
+        for fp in fingerprints:
+            if fp == last:
+                continue
+            last = fp
+            chunk.append(fp)
+            if len(chunk) >= 65536:
+                chunk.tofile(file)
+                chunk = array('Q')
+        chunk.tofile(file)
+        file.flush()
+        if file.tell() == 0:  # an empty file cannot be mapped
+            return (file, None, [])
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return (file, mapping, memoryview(mapping).cast('Q'))
+
+    def release(self, run):
+        file, mapping, disk = run
+        if mapping is not None:
+            disk.release()
+            mapping.close()
+        file.close()
+
+    def close(self):
+        """Release the disk files. The fingerprints they contain are lost."""
+        for run in self.runs:
+            self.release(run)
+        self.runs = []
@@ -17,86 +17,349 @@ along with this program; if not, see <http://www.gnu.org/licenses/>.
 
 """
 
+from math import nextafter
+from time import time
+
 inf = float("inf")
 
-def search(state, player, prune=True):
+# Number of positions searched between two checks of the deadline
+CHECK_EVERY = 128
+
+# Half-width of the aspiration window around the guessed value of a search
+ASPIRATION_WINDOW = 5
+
+# Kinds of value stored in a TranspositionTable entry
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class TranspositionTable:
+    """Values of the positions already searched, to reuse them when they are
+    reached again by another path, at the next iteration of an iterative
+    deepening, or at the next moves of the game.
+
+    An entry is a tuple (key, draft, flag, value, action, age): the hash of
+    the position, the depth searched below it, its value for the player to
+    move, whether this value is EXACT or
+    only a LOWER or UPPER bound (the search of the position was cut by
+    alpha-beta), the best action found, and the age of the table when it was
+    stored. The table has a fixed number of slots (size, rounded up to a
+    power of 2), and a position can only be stored in the slot given by its
+    hash. A new entry replaces the one in its slot if that one is of an older
+    age or was not searched deeper (depth-preferred replacement).
+
+    Arguments:
+    size -- the maximum number of entries
+
+    """
+
+    def __init__(self, size=2 ** 18):
+        self.bits = max(1, (size - 1).bit_length())
+        self.slots = [None] * (1 << self.bits)
+        self.age = 0
+
+    def new_search(self):
+        """Start a new move: the entries of the previous ones are kept, but
+        they can be replaced by any entry of the new one."""
+        self.age += 1
+
+    def index(self, key):
+        # Fibonacci hashing: the product spreads the bits of the key
+        return ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> (64 - self.bits)
+
+    def lookup(self, key):
+        """Return the entry of the position of hash key, or None."""
+        entry = self.slots[self.index(key)]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, draft, flag, value, action):
+        """Store the result of the search of the position of hash key, if it
+        is worth replacing the entry of its slot."""
+        i = self.index(key)
+        old = self.slots[i]
+        if old is None or old[5] != self.age or draft >= old[1]:
+            self.slots[i] = (key, draft, flag, value, action, self.age)
+
+
+class MoveOrdering:
+    """Order in which the successors of a position are searched, to get
+    alpha-beta cutoffs as early as possible. It is kept over the iterations
+    of an iterative deepening, that each start from what the previous ones
+    learnt. The successors are tried in this order:
+    - the action of the principal variation (pv) of the previous iteration,
+      while the search follows it;
+    - the best action stored for the position in the transposition table;
+    - the killer actions: the last two actions that caused a cutoff at the
+      same depth, in a sibling position;
+    - the other actions, by decreasing history score: the sum of the
+      squared remaining depths of the cutoffs they caused for that side.
+
+    """
+
+    def __init__(self):
+        self.pv = []
+        self.killers = {}
+        self.history = {}
+
+    def new_search(self):
+        """Start a new move: the principal variation and the killers are
+        forgotten, and the history scores are halved."""
+        self.pv = []
+        self.killers = {}
+        for key in self.history:
+            self.history[key] //= 2
+
+    def order(self, actions, depth, on_pv, hash_action):
+        """Sort the list of the actions of a position at depth, that is on
+        the principal variation if on_pv."""
+        pv_action = self.pv[depth] if on_pv and depth < len(self.pv) else None
+        killers = self.killers.get(depth, ())
+        side = depth % 2
+
+        def rank(a):
+            if a == pv_action:
+                return 0, 0
+            if a == hash_action:
+                return 1, 0
+            if a in killers:
+                return 2, killers.index(a)
+            return 3, -self.history.get((side, a), 0)
+        actions.sort(key=rank)
+        return actions
+
+    def save(self):
+        """Return a copy of what was learnt so far, for restore."""
+        return {depth: list(killers) for depth, killers in self.killers.items()}, dict(self.history)
+
+    def restore(self, saved):
+        """Go back to what was learnt when save returned saved."""
+        killers, history = saved
+        self.killers = {depth: list(k) for depth, k in killers.items()}
+        self.history = dict(history)
+
+    def record_cutoff(self, depth, action, draft):
+        """Learn that action caused a cutoff at depth, with draft plies left
+        to search."""
+        killers = self.killers.setdefault(depth, [])
+        if action not in killers:
+            killers.insert(0, action)
+            del killers[2:]
+        key = (depth % 2, action)
+        self.history[key] = self.history.get(key, 0) + draft * draft
+
+
+class TimeUp(Exception):
+    """Raised by search when its deadline has passed."""
+
+
+def effective_branching_factor(nodes):
+    """Return the factor by which the number of positions searched grows
+    from one iteration of an iterative deepening to the next, given the
+    numbers of the iterations done so far (None if there are less than 2).
+    Alpha-beta searches alternately more and less of the tree at odd and
+    even depths, so the growth over the last two iterations is averaged
+    when it is known.
+
+    """
+    if len(nodes) >= 3 and nodes[-3] > 0:
+        return (nodes[-1] / nodes[-3]) ** 0.5
+    if len(nodes) >= 2 and nodes[-2] > 0:
+        return nodes[-1] / nodes[-2]
+    return None
+
+
+def search(state, player, prune=True, table=None, max_depth=None, ordering=None,
+           deadline=None, stats=None, guess=None):
     """Perform a MiniMax/AlphaBeta search and return the best action.
 
+    The search is a negamax: the value of a position is the one for the
+    player to move, that is the opposite of its value for the player of the
+    previous position, so one function searches the positions of both
+    players. With pruning, it is a principal variation search: the first
+    successor of a position is searched with the (alpha, beta) window, and
+    the next ones with a null window that only tells whether they are better;
+    only those that are get searched again with the whole window. The value
+    and action found are the same as with a plain alpha-beta search.
+    It returns (value, action, best), where best is the principal variation:
+    the list of the actions of both players expected from state.
+
     Arguments:
     state -- initial state
     player -- a concrete instance of class AlphaBetaPlayer
     prune -- whether to use AlphaBeta pruning
+    table -- a TranspositionTable of the positions already searched by the
+             player, that is updated by the search
+    max_depth -- the depth at which player.cutoff stops the search, needed
+                 with a table to know how deep each position is searched
+    ordering -- a MoveOrdering that sorts the actions of each position
+                and learns from the search (its principal variation is set
+                to the one found). The successors are then built from the
+                sorted actions with state.copy() and apply_action, each one
+                only when it is about to be searched, so none is built
+                after a cutoff.
+    deadline -- a time (as returned by time.time()) at which the search is
+                stopped by raising TimeUp. It is checked every CHECK_EVERY
+                positions. The table and the ordering are left consistent,
+                so the caller can keep the result of its previous search.
+    stats -- a dict in which 'nodes', the number of positions searched, is
+             set (even if the search was stopped)
+    guess -- an estimate of the value, e.g. the one of the previous
+             iteration of an iterative deepening. The search first uses the
+             aspiration window guess +- ASPIRATION_WINDOW, and only searches
+             again with a wider one if the value is out of it.
 
     """
-    def max_value(state, alpha, beta, depth):
-        if player.cutoff(state, depth):
-            return player.evaluate(state), None
-        val = -inf
-        action = None
-        for a, s in player.successors(state):
-            v, _ = min_value(s, alpha, beta, depth + 1)
-            if v > val:
-                val = v
-                action = a
-                if prune:
-                    if v >= beta:
-                        return v, a
-                    alpha = max(alpha, v)
-        return val, action
+    if table is not None and max_depth is None:
+        raise ValueError("a transposition table needs the max_depth of the search")
+    nodes = 0
+    # Triangular PV table: pv_table[ply][ply:pv_length[ply]] is the principal
+    # variation of the position searched at depth ply
+    pv_table = [[None] * (max_depth + 1) for _ in range(max_depth + 2)] if max_depth is not None else []
+    pv_length = [0] * len(pv_table)
 
-    def min_value(state, alpha, beta, depth):
-        if player.cutoff(state, depth):
-            return player.evaluate(state), None
-        val = inf
-        action = None
-        for a, s in player.successors(state):
-            v, _ = max_value(s, alpha, beta, depth + 1)
-            if v < val:
-                val = v
-                action = a
-                if prune:
-                    if v <= alpha:
-                        return v, a
-                    beta = min(beta, v)
-        return val, action
+    def count_node():
+        nonlocal nodes
+        nodes += 1
+        if deadline is not None and nodes % CHECK_EVERY == 0 and time() >= deadline:
+            raise TimeUp()
+
+    def probe(entry, alpha, beta, depth):
+        """Return the (value, action) of the table entry of a position, if it
+        is enough to skip its search."""
+        if entry is None or entry[1] < max_depth - depth:
+            return None
+        _, _, flag, value, action, _ = entry
+        if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+            return value, action
+        return None
+
+    def save(key, alpha, beta, depth, value, action):
+        if value <= alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        table.store(key, max_depth - depth, flag, value, action)
+
+    def successors(state, depth, on_pv, hash_action):
+        if ordering is None:
+            yield from player.successors(state)
+            return
+        for a in ordering.order(list(state.get_current_player_actions()), depth, on_pv, hash_action):
+            s = state.copy()
+            s.apply_action(a)
+            yield a, s
+
+    def follows_pv(on_pv, depth, action):
+        """Whether the child reached by action is still on the principal
+        variation of the previous iteration."""
+        return on_pv and depth < len(ordering.pv) and ordering.pv[depth] == action
+
+    def record_cutoff(depth, action):
+        if ordering is not None:
+            ordering.record_cutoff(depth, action, 1 if max_depth is None else max_depth - depth)
+
+    def start_pv(ply):
+        while len(pv_table) <= ply + 1:
+            pv_table.append([])
+            pv_length.append(0)
+        pv_length[ply] = ply
 
-    def max_value_check(state, alpha, beta, depth):
+    def update_pv(ply, action):
+        """The principal variation at ply is action followed by the one of
+        its position, that was just searched at ply + 1."""
+        row = pv_table[ply]
+        child = pv_table[ply + 1]
+        length = max(pv_length[ply + 1], ply + 1)
+        if len(row) < length:
+            row.extend([None] * (length - len(row)))
+        row[ply] = action
+        for i in range(ply + 1, length):
+            row[i] = child[i]
+        pv_length[ply] = length
+
+    def negamax(state, alpha, beta, depth, color, on_pv):
+        start_pv(depth)
+        if table is not None:
+            key = hash(state)
+            entry = table.lookup(key)
+            if depth > 0:
+                hit = probe(entry, alpha, beta, depth)
+                if hit is not None:
+                    if hit[1] is not None:
+                        pv_length[depth + 1] = depth + 1
+                        update_pv(depth, hit[1])
+                    return hit[0]
+            hash_action = None if entry is None else entry[4]
+        else:
+            hash_action = None
+        count_node()
         if player.cutoff(state, depth):
-            return player.evaluate(state), None, None
+            val = color * player.evaluate(state)
+            if table is not None:
+                # A static evaluation does not depend on the window
+                table.store(key, max_depth - depth, EXACT, val, None)
+            return val
+        alpha_start = alpha
         val = -inf
         action = None
-        best = []
-        for a, s in player.successors(state):
-            v, _, best_local = min_value_check(s, alpha, beta, depth + 1)
+        first = True
+        for a, s in successors(state, depth, on_pv, hash_action):
+            child_on_pv = follows_pv(on_pv, depth, a)
+            if first or not prune:
+                v = -negamax(s, -beta, -alpha, depth + 1, -color, child_on_pv)
+            else:
+                # Null window: is this successor better than alpha ?
+                v = -negamax(s, -nextafter(alpha, inf), -alpha, depth + 1, -color, child_on_pv)
+                if alpha < v < beta:
+                    # It is, and v is a lower bound of its value: search it again
+                    # with the window (v, beta)
+                    lower = v
+                    v = -negamax(s, -beta, -lower, depth + 1, -color, child_on_pv)
+                    if v <= lower:
+                        # Its value is exactly the bound, but not its principal variation
+                        v = lower
+                        pv_length[depth + 1] = depth + 1
+            first = False
             if v > val:
                 val = v
                 action = a
-                best = [] if best_local is None else best_local
+                update_pv(depth, a)
                 if prune:
                     if v >= beta:
-                        return v, a, [a] + [best]
+                        record_cutoff(depth, a)
+                        break
                     alpha = max(alpha, v)
-        best = [action] + best
-        return val, action, best
-
-    def min_value_check(state, alpha, beta, depth):
-        if player.cutoff(state, depth):
-            return player.evaluate(state), None, None
-        val = inf
-        action = None
-        bestt = []
-        for a, s in player.successors(state):
-            v, _, best_local = max_value_check(s, alpha, beta, depth + 1)
-            if v < val:
-                val = v
-                action = a
-                bestt = [] if best_local is None else best_local
-                if prune:
-                    if v <= alpha:
-                        return v, a, [a] + [bestt]
-                    beta = min(beta, v)
-        bestt = [action] + bestt
-        return val, action, bestt
+        if table is not None:
+            save(key, alpha_start, beta, depth, val, action)
+        return val
 
-    value, action, best = max_value_check(state, -inf, inf, 0)
+    on_pv = ordering is not None
+    try:
+        if guess is None or not prune:
+            value = negamax(state, -inf, inf, 0, 1, on_pv)
+        else:
+            alpha, beta = guess - ASPIRATION_WINDOW, guess + ASPIRATION_WINDOW
+            # A search out of the window is searched again as if it was not
+            # done, so that the successors are tried in the same order
+            saved = ordering.save() if ordering is not None else None
+            while True:
+                if saved is not None:
+                    ordering.restore(saved)
+                value = negamax(state, alpha, beta, 0, 1, on_pv)
+                if value <= alpha and alpha > -inf:
+                    alpha = -inf
+                elif value >= beta and beta < inf:
+                    beta = inf
+                else:
+                    break
+    finally:
+        if stats is not None:
+            stats['nodes'] = nodes
+    best = pv_table[0][:pv_length[0]]
+    action = best[0] if best else None
+    if ordering is not None:
+        ordering.pv = best
     return value, action, best
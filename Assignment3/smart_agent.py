@@ -15,16 +15,27 @@ class MyAgent(AlphaBetaAgent):
     This is the skeleton of an agent to play the Squadro game.
     """
 
+    # Number of entries of the transposition table
+    TABLE_SIZE = 2 ** 18
+    # Keep the transposition table from one move to the next
+    KEEP_TABLE = True
+    table = None
+    ordering = None
+
     def get_action(self, state, last_action, time_left):
         self.last_action = last_action
         self.time_left = time_left
+        if self.table is None or not self.KEEP_TABLE:
+            self.table = minimax.TranspositionTable(self.TABLE_SIZE)
+        self.table.new_search()
+        if self.ordering is None:
+            self.ordering = minimax.MoveOrdering()
+        self.ordering.new_search()
         self.count = 0
+        # The iterative deepening starts at depth 1: the shallow iterations are cheap, and fill the table and the
+        # move ordering for the deeper ones
         self.threshold = 0
 
-        # If we have enough time, we start the threshold at a 'high' value: 5
-        if self.time_left > 450: # Half the time
-            self.threshold = 5
-
         number_of_moves_left = 0
         for i in range(5):
             if state.is_pawn_finished(self.id, i):
@@ -42,12 +53,37 @@ class MyAgent(AlphaBetaAgent):
                 self.count += 1
             if state.is_pawn_finished(1 - self.id, pawn):
                 self.count += 1
-        #iterative deepening
-        tmp = 0
-        while time() - self.time_begin_research < self.time_left_that_research / 1.5:
+        #iterative deepening, stopped at the deadline even in the middle of an iteration, except the first one: a
+        #search of depth 1 is always completed, so that the action played has been searched
+        deadline = self.time_begin_research + self.time_left_that_research
+        action = None
+        nodes = []
+        values = []
+        while True:
             self.threshold += 1
-            tmp = minimax.search(state, self)
-        return tmp
+            begin = time()
+            stats = {}
+            # The values alternate between odd and even depths: the aspiration window is centered on the value
+            # found 2 plies less deep
+            guess = values[-2] if len(values) >= 2 else None
+            try:
+                value, new_action, best = minimax.search(state, self, table=self.table, max_depth=self.threshold,
+                                                         ordering=self.ordering,
+                                                         deadline=deadline if action is not None else None,
+                                                         stats=stats,
+                                                         guess=guess)
+            except minimax.TimeUp:
+                # Keep the action of the last completed iteration
+                self.threshold -= 1
+                break
+            action = new_action
+            nodes.append(stats['nodes'])
+            values.append(value)
+            # Do not start an iteration that is not expected to end before the deadline
+            factor = minimax.effective_branching_factor(nodes)
+            if factor is not None and time() + (time() - begin) * factor > deadline:
+                break
+        return action
 
     """
     The successors function must return (or yield) a list of
@@ -318,68 +354,9 @@ class MyAgent(AlphaBetaAgent):
 
     def apply_action_evaluation(self, action, state):
         """
-        Iame function as squadro_state.py with the addition of the number of pawn crossed
-        It's useful for the evaluation of a state
-        """
-        if not state.returning[state.cur_player][action]:
-            n_moves = squadro_state.MOVES[state.cur_player][action]
-        else:
-            n_moves = squadro_state.MOVES_RETURN[state.cur_player][action]
-
-        total_crossed = 0
-        crossed = False
-
-        for i in range(n_moves):
-            ret_before = state.returning[state.cur_player][action]
-            state.move_1(state.cur_player, action)
-
-            if state.returning[state.cur_player][action] != ret_before:
-                break
-            if state.finished[state.cur_player][action]:
-                break
-            crossed, how_much = self.check_crossings_evaluation(state.cur_player, action, state)
-            if crossed:
-                total_crossed += how_much
-                break
-        return crossed, total_crossed
-
-    def check_crossings_evaluation(self, player, pawn, state):
-        """
-        Same function as squadro_state.py with the addition of the number of pawn crossed
-        It's useful for the evaluation of a state
+        Same function as apply_action of squadro_state.py, but the current player is not changed and
+        the number of pawn crossed is returned too. It's useful for the evaluation of a state
         """
-        ended = False
-        crossed = False
-        total = 0
-
-        if player == 0:
-            while not ended:
-                opponent_pawn = int(state.cur_pos[0][pawn][1] / 100) - 1
-
-                if not 0 <= opponent_pawn <= 4:
-                    ended = True
-                elif state.cur_pos[1][opponent_pawn][0] != state.cur_pos[0][pawn][0]:
-                    ended = True
-
-                else:
-                    crossed = True
-                    total += 1
-                    state.move_1(0, pawn)
-                    state.return_init(1, opponent_pawn)
-
-        else:
-            while not ended:
-                opponent_pawn = int(state.cur_pos[1][pawn][0] / 100) - 1
-
-                if not 0 <= opponent_pawn <= 4:
-                    ended = True
-                elif state.cur_pos[0][opponent_pawn][1] != state.cur_pos[1][pawn][1]:
-                    ended = True
-
-                else:
-                    crossed = True
-                    total += 1
-                    state.move_1(1, pawn)
-                    state.return_init(0, opponent_pawn)
-
-        return crossed, total
\ No newline at end of file
+        total_crossed = state.apply_action(action)
+        state.cur_player = 1 - state.cur_player
+        return total_crossed > 0, total_crossed
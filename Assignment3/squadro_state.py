@@ -1,7 +1,6 @@
 import minimax
 import random
 from state import State
-from copy import deepcopy
 
 # Pawn initial positions
 INIT_POS = [[(100, 600), (200, 600), (300, 600), (400, 600), (500, 600)], [(600, 100), (600, 200), (600, 300), (600, 400), (600, 500)]]
@@ -11,6 +10,15 @@ INIT_RET_POS = [[(100, 0), (200, 0), (300, 0), (400, 0), (500, 0)], [(0, 100), (
 MOVES = [[1, 3, 2, 3, 1], [3, 1, 2, 1, 3]]
 MOVES_RETURN = [[3, 1, 2, 1, 3], [1, 3, 2, 3, 1]]
 
+# Distance (in tiles) between the pawn and the side where its crossing line starts, by advancement:
+# the pawn goes from 6 to 0 on its way, and from 0 back to 6 on its return journey
+COORD = [6, 5, 4, 3, 2, 1, 0, 1, 2, 3, 4, 5, 6]
+
+# The state is packed in an int: the advancement (0 to 12) of the pawn 'pawn' of 'player' is
+# stored in the 4 bits at SHIFT[player][pawn]. A pawn is returning from advancement 6 on,
+# and finished at advancement 12.
+SHIFT = [[4 * pawn for pawn in range(5)], [4 * (5 + pawn) for pawn in range(5)]]
+
 class SquadroState(State):
 
   def __init__(self):
@@ -18,12 +26,10 @@ class SquadroState(State):
     self.winner = None
     self.timeout_player = None
     self.invalid_player = None
-    # Position of the pawns
-    self.cur_pos = deepcopy(INIT_POS)
-    # Are the pawns on their return journey ?
-    self.returning = [[False, False, False, False, False], [False, False, False, False, False]]
-    # Have the pawns completed their journey ?
-    self.finished = [[False, False, False, False, False], [False, False, False, False, False]]
+    # Advancement of the pawns (see SHIFT), all pawns start at 0
+    self.board = 0
+    # (board, winner) before each applied action, for undo_action
+    self.history = []
 
   def __str__(self):
     s = ""
@@ -36,7 +42,10 @@ class SquadroState(State):
     return s
 
   def __eq__(self, other):
-    return self.cur_player == other.cur_player and self.cur_pos == other.cur_pos
+    return self.cur_player == other.cur_player and self.board == other.board
+
+  def __hash__(self):
+    return self.board << 1 | self.cur_player
 
   
   def set_timed_out(self, player):
@@ -53,55 +62,62 @@ class SquadroState(State):
   Returns the position of the requested pawn ((x, y) position on the board (i.e. in multiples of 100))
   """
   def get_pawn_position(self, player, pawn):
-    return self.cur_pos[player][pawn]
+    coord = 100 * COORD[self.get_pawn_advancement(player, pawn)]
+    if player == 0:
+      return (100 * (pawn + 1), coord)
+    return (coord, 100 * (pawn + 1))
 
 
   """
   Returns the number of tiles the pawn has advanced (i.e. {0, ..., 12})
   """
   def get_pawn_advancement(self, player, pawn):
-    if self.is_pawn_finished(player, pawn):
-      return 12
-    elif self.is_pawn_returning(player, pawn):
-      if player == 0:
-        nb = self.get_pawn_position(player, pawn)[1] / 100
-      else:
-        nb = self.get_pawn_position(player, pawn)[0] / 100
-      return int(6 + nb)
-    else:
-      if player == 0:
-        nb = (600 - self.get_pawn_position(player, pawn)[1]) / 100
-      else:
-        nb = (600 - self.get_pawn_position(player, pawn)[0]) / 100
-      return int(nb)
+    return (self.board >> SHIFT[player][pawn]) & 15
 
 
   """
   Returns whether the pawn is on its return journey or not
   """
   def is_pawn_returning(self, player, pawn):
-    return self.returning[player][pawn]
+    return self.get_pawn_advancement(player, pawn) >= 6
 
 
   """
   Returns whether the pawn has finished its journey
   """
   def is_pawn_finished(self, player, pawn):
-    return self.finished[player][pawn]
+    return self.get_pawn_advancement(player, pawn) == 12
 
 
   """
-  Return a deep copy of this state.
+  Read-only views of the state as it was stored before it was packed in an int,
+  for the agents that still read them: the positions of the pawns ((x, y) in multiples of 100),
+  whether they are on their return journey, and whether they completed it.
+  """
+  @property
+  def cur_pos(self):
+    return [[self.get_pawn_position(player, pawn) for pawn in range(5)] for player in range(2)]
+
+  @property
+  def returning(self):
+    return [[self.is_pawn_returning(player, pawn) for pawn in range(5)] for player in range(2)]
+
+  @property
+  def finished(self):
+    return [[self.is_pawn_finished(player, pawn) for pawn in range(5)] for player in range(2)]
+
+
+  """
+  Return a copy of this state (the history of undo_action is not copied).
   """
   def copy(self):
-    cp = SquadroState()
+    cp = SquadroState.__new__(SquadroState)
     cp.cur_player = self.cur_player
     cp.winner = self.winner
     cp.timeout_player = self.timeout_player
     cp.invalid_player = self.invalid_player
-    cp.cur_pos = deepcopy(self.cur_pos)
-    cp.returning = deepcopy(self.returning)
-    cp.finished = deepcopy(self.finished)
+    cp.board = self.board
+    cp.history = []
     return cp
 
 
@@ -118,14 +134,15 @@ class SquadroState(State):
   Checks if a player succeeded to win the game, i.e. move 4 pawns to the other side and back again.
   """
   def game_over_check(self):
-    if sum(self.finished[0]) >= 4:
-      self.winner = 0
-      return True
-    elif sum(self.finished[1]) >= 4:
-      self.winner = 1
-      return True
-    else:
-      return False
+    for player in range(2):
+      finished = 0
+      for pawn in range(5):
+        if self.is_pawn_finished(player, pawn):
+          finished += 1
+      if finished >= 4:
+        self.winner = player
+        return True
+    return False
 
 
   """
@@ -149,7 +166,7 @@ class SquadroState(State):
   def get_current_player_actions(self):
     actions = []
     for i in range(5):
-      if not self.finished[self.cur_player][i]:
+      if not self.is_pawn_finished(self.cur_player, i):
         actions.append(i)
     return actions
 
@@ -158,24 +175,37 @@ class SquadroState(State):
   """
   Applies a given action to this state. It assume that the actions is
   valid. This must be checked with is_action_valid.
+  Returns the number of opponent pawns that were sent back.
   """
   def apply_action(self, action):
-    if not self.returning[self.cur_player][action]:
-      n_moves = MOVES[self.cur_player][action]
+    self.history.append((self.board, self.winner))
+    player = self.cur_player
+    if not self.is_pawn_returning(player, action):
+      n_moves = MOVES[player][action]
     else:
-      n_moves = MOVES_RETURN[self.cur_player][action]
+      n_moves = MOVES_RETURN[player][action]
     
+    crossed = 0
     for i in range(n_moves):
-      ret_before = self.returning[self.cur_player][action]
-      self.move_1(self.cur_player, action)
+      self.move_1(player, action)
       
-      if self.returning[self.cur_player][action] != ret_before:
-        break
-      if self.finished[self.cur_player][action]:
+      advancement = self.get_pawn_advancement(player, action)
+      if advancement == 6 or advancement == 12:  # the pawn turned back or finished
         break
-      if self.check_crossings(self.cur_player, action):
+      crossed = self.check_crossings(player, action)
+      if crossed:
         break
     
+    self.cur_player = 1 - player
+    return crossed
+
+
+  """
+  Undoes the last action applied with apply_action (the state must not have been changed since,
+  except by other apply_action/undo_action pairs).
+  """
+  def undo_action(self):
+    self.board, self.winner = self.history.pop()
     self.cur_player = 1 - self.cur_player
 
 
@@ -183,76 +213,35 @@ class SquadroState(State):
   Moves the pawn one tile forward in the correct direction
   """
   def move_1(self, player, pawn):
-    if player == 0:
-      if not self.returning[player][pawn]:
-        self.cur_pos[player][pawn] = (self.cur_pos[player][pawn][0], self.cur_pos[player][pawn][1] - 100)
-        if (self.cur_pos[player][pawn][1] <= 0):
-          self.returning[player][pawn] = True
-      
-      else:
-        self.cur_pos[player][pawn] = (self.cur_pos[player][pawn][0], self.cur_pos[player][pawn][1] + 100)
-        if (self.cur_pos[player][pawn][1] >= 600):
-          self.finished[player][pawn] = True
-    
-    else:
-      
-      if not self.returning[player][pawn]:
-        self.cur_pos[player][pawn] = (self.cur_pos[player][pawn][0] - 100, self.cur_pos[player][pawn][1])
-        if (self.cur_pos[player][pawn][0] <= 0):
-          self.returning[player][pawn] = True
-      
-      else:
-        self.cur_pos[player][pawn] = (self.cur_pos[player][pawn][0] + 100, self.cur_pos[player][pawn][1])
-        if (self.cur_pos[player][pawn][0] >= 600):
-          self.finished[player][pawn] = True
+    if not self.is_pawn_finished(player, pawn):
+      self.board += 1 << SHIFT[player][pawn]
 
 
   """
   Puts the pawn back at the start (or the return start)
   """
   def return_init(self, player, pawn):
-    if not self.returning[player][pawn]:
-      self.cur_pos[player][pawn] = INIT_POS[player][pawn]
-    else:
-      self.cur_pos[player][pawn] = INIT_RET_POS[player][pawn]
+    advancement = self.get_pawn_advancement(player, pawn)
+    init = 0 if advancement < 6 else 6
+    self.board += (init - advancement) << SHIFT[player][pawn]
 
 
   """
-  Returns whether the pawn crossed one or more opponents and updates the state accordingly
+  Returns the number of opponents the pawn crossed (0 if none) and updates the state accordingly
   """
   def check_crossings(self, player, pawn):
-    ended = False
-    crossed = False
-    
-    if player == 0:
-      while not ended:
-        opponent_pawn = int(self.cur_pos[0][pawn][1] / 100) - 1
-        
-        if not 0 <= opponent_pawn <= 4:
-          ended = True
-        elif self.cur_pos[1][opponent_pawn][0] != self.cur_pos[0][pawn][0]:
-          ended = True
-        
-        else:
-          crossed = True
-          self.move_1(0, pawn)
-          self.return_init(1, opponent_pawn)
-
-    else:
-      while not ended:
-        opponent_pawn = int(self.cur_pos[1][pawn][0] / 100) - 1
-        
-        if not 0 <= opponent_pawn <= 4:
-          ended = True
-        elif self.cur_pos[0][opponent_pawn][1] != self.cur_pos[1][pawn][1]:
-          ended = True
-        
-        else:
-          crossed = True
-          self.move_1(1, pawn)
-          self.return_init(0, opponent_pawn)
-
-    return crossed
+    crossed = 0
+    while True:
+      # The opponent pawn whose line the pawn is on, if any
+      opponent_pawn = COORD[self.get_pawn_advancement(player, pawn)] - 1
+      if not 0 <= opponent_pawn <= 4:
+        return crossed
+      # It is crossed if it is on the line of the pawn
+      if COORD[self.get_pawn_advancement(1 - player, opponent_pawn)] != pawn + 1:
+        return crossed
+      crossed += 1
+      self.move_1(player, pawn)
+      self.return_init(1 - player, opponent_pawn)
     
 
   """